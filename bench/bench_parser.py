@@ -0,0 +1,317 @@
+"""Parser benchmark: messages/sec and allocation per parse, new vs. legacy.
+
+    python bench/bench_parser.py [--lines 50000] [--seed 7]
+
+The legacy path below is the pre-rewrite find_time_keyword_location plus the
+spawn_key logic that used to live in on_message, kept verbatim as a baseline.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spawn_parser import is_candidate, parse_message  # noqa: E402
+
+# ---------------- LEGACY TABLES ----------------
+# The hard-coded tables the legacy path read, as they were before spawns.toml.
+ROOM_NAMES = {
+    "AP": "Airport",
+    "HB": "Harbor",
+    "SHB": "Small Harbor",
+    "BANDIT": "Bandit Camp",
+    "BIO": "Bio-Research Lab",
+    "NUC": "Nuclear Plant",
+    "MILI": "Military Base",
+    "RB": "Rocket Base",
+    "CRUDE": "Crude Oil Base",
+    "BS SNOW": "Snow Mountain Bomb Shelter",
+    "DOCK": "Dock",
+    "FACTORY": "Chemical Factory",
+}
+
+BOSS_NAMES = {
+    "EG": "EG Mutant",
+    "AVG": "Avenger",
+    "TANK": "Tank",
+    "BN": "Bloodnest"
+}
+
+CARD_NAMES = {"PCARD": "Purple Card", "BCARD": "Blue Card"}
+
+CARD_LOCATIONS = {
+    "BS UP": "Bomb Shelter Upper",
+    "BS BOT": "Bomb Shelter Bottom",
+    "BS BOTTOM": "Bomb Shelter Bottom",
+    "AP": "Airport",
+    "HB": "Harbor",
+    "SHB": "Small Harbor",          # FIX: was missing from CARD_LOCATIONS
+    "NUC": "Nuclear Plant",
+    "MILI": "Military Base",
+    "BIO": "Bio-Research Lab",
+    "BANDIT": "Bandit Camp",
+    "RB": "Rocket Base",
+    "CRUDE": "Crude Oil Base",
+    "BS SNOW": "Snow Mountain Bomb Shelter",
+    "DOCK": "Dock",
+    "FACTORY": "Chemical Factory",
+    "ARC": "Abandoned Research Center",
+    "AFC": "Abandoned Factory Center",
+}
+
+LOCATION_ALIASES = {
+    "BS": "BS BOT",
+    "BSUP": "BS UP",
+    "BSUPPER": "BS UP",
+    "BS BOT": "BS BOT",
+    "BSBOT": "BS BOT",
+    "BOT": "BS BOT",
+    "BOTTOM": "BS BOT",
+    "DOWN": "BS BOT",
+    "BELOW": "BS BOT",
+    "AP": "AP",
+    "AIRPORT": "AP",
+    "HB": "HB",
+    "HARBOR": "HB",
+    "NUC": "NUC",
+    "NUCLEAR": "NUC",
+    "MILI": "MILI",
+    "MILITARY": "MILI",
+    "BIO": "BIO",
+    "BANDIT": "BANDIT",
+    "RB": "RB",
+    "ROCKET": "RB",
+    "ROCKETBASE": "RB",
+    "CRUDE": "CRUDE",
+    "CRUDEOIL": "CRUDE",
+    "CRUDEOILBASE": "CRUDE",
+    "BS SNOW": "BS SNOW",
+    "SNOW": "BS SNOW",
+    "SNOWMOUNTAIN": "BS SNOW",
+    "DOCK": "DOCK",
+    "FACTORY": "FACTORY",
+    "CHEMICALFACTORY": "FACTORY",
+    "SHB": "SHB",
+    "SMALLHARBOR": "SHB",
+    "ARC": "ARC",
+    "AFC": "AFC",
+}
+
+ROOM_KEYS = set(ROOM_NAMES.keys()) | {v.upper() for v in ROOM_NAMES.values()}
+BOSS_KEYS = set(BOSS_NAMES.keys()) | {v.upper() for v in BOSS_NAMES.values()}
+CARD_KEYS = set(CARD_NAMES.keys()) | {v.upper() for v in CARD_NAMES.values()}
+
+
+# ---------------- LEGACY PATH ----------------
+time_regex = re.compile(r"(?i)(\d{1,2}:\d{2}\s*(?:AM|PM))")
+word_token = re.compile(r"([A-Za-z]+)")
+
+
+def normalize_token(tok):
+    return re.sub(r'[^A-Za-z]', '', tok).upper()
+
+
+def find_time_keyword_location(message):
+    s = message
+    time_m = time_regex.search(s)
+    time_str = time_m.group(1).upper() if time_m else None
+
+    tokens = [normalize_token(t) for t in word_token.findall(s)]
+    type_key = None
+    location_key = None
+
+    for t in tokens:
+        if t in CARD_KEYS:
+            type_key = t
+            break
+    if not type_key:
+        for t in tokens:
+            if t in BOSS_KEYS:
+                type_key = t
+                break
+    if not type_key and "BLOOD" in tokens:
+        type_key = "BN"
+    if not type_key:
+        for t in tokens:
+            if t in ROOM_KEYS:
+                type_key = t
+                break
+
+    for i in range(len(tokens)-1, -1, -1):
+        two = (tokens[i-1] + " " + tokens[i]) if i-1 >= 0 else tokens[i]
+        if two in LOCATION_ALIASES:
+            location_key = LOCATION_ALIASES[two]
+            break
+        if tokens[i] in LOCATION_ALIASES:
+            location_key = LOCATION_ALIASES[tokens[i]]
+            break
+
+    if type_key:
+        tk = type_key
+        rev_room = {v.upper(): k for k, v in ROOM_NAMES.items()}
+        rev_boss = {v.upper(): k for k, v in BOSS_NAMES.items()}
+        if tk in rev_room:
+            type_key = rev_room[tk]
+        elif tk in rev_boss:
+            type_key = rev_boss[tk]
+
+    return time_str, type_key, location_key
+
+
+def legacy_parse(content):
+    time_str, type_key, loc_key = find_time_keyword_location(content)
+    if not time_str and not type_key and not loc_key:
+        return None
+    category = key = card_type = location_for_display = None
+    if type_key and type_key in CARD_KEYS:
+        category, card_type = "card", type_key
+    elif type_key and type_key in BOSS_KEYS:
+        category = "boss"
+        rev = {v.upper(): k for k, v in BOSS_NAMES.items()}
+        key = type_key if type_key in BOSS_NAMES else rev.get(type_key, type_key)
+    elif type_key and type_key in ROOM_KEYS:
+        category = "room"
+        rev = {v.upper(): k for k, v in ROOM_NAMES.items()}
+        key = type_key if type_key in ROOM_NAMES else rev.get(type_key, type_key)
+    if not category and loc_key:
+        for short, name in ROOM_NAMES.items():
+            if loc_key.upper() in (short, name.upper()):
+                category, key = "room", short
+                break
+    if not category:
+        for t in re.findall(r"[A-Za-z]+", content):
+            T = t.upper()
+            if T in BOSS_NAMES:
+                category, key = "boss", T
+                break
+            if T in ROOM_NAMES:
+                category, key = "room", T
+                break
+    if loc_key:
+        mapped = LOCATION_ALIASES.get(loc_key.upper(), loc_key.upper())
+        location_for_display = CARD_LOCATIONS.get(mapped) or ROOM_NAMES.get(mapped) or mapped
+    if category == "card" and not location_for_display:
+        for tok in re.findall(r"[A-Za-z]+", content):
+            mapped = LOCATION_ALIASES.get(tok.upper(), tok.upper())
+            if mapped in CARD_LOCATIONS:
+                location_for_display = CARD_LOCATIONS[mapped]
+                break
+    if category in ("boss", "room"):
+        return time_str, key, location_for_display
+    loc_label = None
+    if location_for_display:
+        rev_card_locs = {v.upper(): k for k, v in CARD_LOCATIONS.items()}
+        loc_label = rev_card_locs.get(location_for_display.upper())
+    if loc_key:
+        loc_label = LOCATION_ALIASES.get(loc_key.upper(), loc_label)
+    loc_label = (loc_label or "UNKNOWN").replace(" ", "")
+    return time_str, f"{card_type or 'PCARD'}_{loc_label}", location_for_display
+
+
+def new_parse(content):
+    r = parse_message(content)
+    if not r.is_report:
+        return None
+    return r.time_str, r.spawn_key, r.location
+
+
+# ---------------- CORPUS ----------------
+CHAT = (
+    "lol", "gg", "anyone up for a run?", "brb dinner", "who has the bot role",
+    "server is down again", "so much snow today", "see you all later", "nice one!!",
+    "what time is it there", "thanks for the carry", "ok", "the boss wrecked us",
+    "need 2 more for the raid", "haha", "is the tracker working?", "good morning",
+    "brb 5pm", "see you at 9:30", "back by 14:30", "left 20m ago", "lol :45", "it's -5 out",
+)
+# Reports in the time forms only the extended syntax reads, several naming
+# their spawn by location alone; each must parse and pass the pre-filter.
+EXTENDED_REPORTS = ("bs -15", "snow 20m ago", "bs 45", "nuc :30", "bn 1:30", "eg 14:30", "tank 5pm")
+TYPES = ("pcard", "bcard", "PCARD", "Bcard", "eg", "avg", "avenger", "tank", "bn", "blood",
+         "bloodnest", "ap", "airport", "hb", "shb", "bandit", "bio", "nuc", "mili", "rb",
+         "crude", "dock", "factory")
+LOCS = tuple(LOCATION_ALIASES) + ("bs up", "bs bottom")
+
+
+def random_time(rng):
+    return f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}{rng.choice(('am', 'pm', ' AM', ' pm'))}"
+
+
+def build_corpus(n, seed):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.45:
+            parts = [rng.choice(TYPES), random_time(rng)]
+            if rng.random() < 0.6:
+                parts.append(rng.choice(LOCS).lower())
+            rng.shuffle(parts)
+            lines.append(" ".join(parts))
+        elif r < 0.9:
+            lines.append(rng.choice(CHAT))
+        else:
+            lines.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz :0123456789!?") for _ in range(rng.randint(5, 80))))
+    return lines
+
+
+# ---------------- MEASUREMENT ----------------
+def throughput(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for line in corpus:
+            fn(line)
+        best = min(best, time.perf_counter() - t0)
+    return len(corpus) / best
+
+
+def bytes_per_parse(fn, corpus):
+    sample = corpus[:5000]
+    tracemalloc.start()
+    total = 0
+    for line in sample:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(line)
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return total / len(sample)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    corpus = build_corpus(args.lines, args.seed)
+    # Lines whose time only the extended syntax reads ("14:30", "-15", a bare
+    # minute) are meant to differ; everything else must classify as before.
+    extended = {line for line in corpus if parse_message(line).time_str and not time_regex.search(line)}
+    mismatches = [line for line in corpus if line not in extended and legacy_parse(line) != new_parse(line)]
+    if mismatches:
+        print(f"!! {len(mismatches)} lines classify differently, e.g. {mismatches[:3]}")
+    chat = [line for line in CHAT if is_candidate(line) and parse_message(line).is_report]
+    if chat:
+        print(f"!! {len(chat)} chat lines parse as reports, e.g. {chat[:3]}")
+    dropped = [line for line in EXTENDED_REPORTS if not (parse_message(line).when and is_candidate(line))]
+    if dropped:
+        print(f"!! {len(dropped)} reports are not read or not let through the pre-filter: {dropped}")
+
+    print(f"corpus: {len(corpus)} lines ({len(extended)} read only by the extended time syntax)")
+    print(f"{'parser':<8} {'msgs/sec':>12} {'peak B/parse':>14}")
+    for name, fn in (("legacy", legacy_parse), ("new", new_parse)):
+        print(f"{name:<8} {throughput(fn, corpus, args.repeat):>12,.0f} {bytes_per_parse(fn, corpus):>14,.0f}")
+    print(f"{'filter':<8} {throughput(is_candidate, corpus, args.repeat):>12,.0f} {bytes_per_parse(is_candidate, corpus):>14,.0f}")
+
+    rejected = sum(1 for line in corpus if not is_candidate(line))
+    print(f"pre-filter rejects {rejected / len(corpus):.1%} of the corpus")
+
+
+if __name__ == "__main__":
+    main()
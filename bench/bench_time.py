@@ -0,0 +1,158 @@
+"""Time-reading benchmark: cost per report of turning its text into a taken time.
+
+    python bench/bench_time.py [--reports 50000] [--seed 7]
+
+The legacy path below is the pre-rewrite lexer time token plus
+parse_time_string_to_pht, kept verbatim as a baseline: strptime and a
+clock read per step, falling back to "now" for anything else. The new path
+is spawn_parser's parse_message and resolve_taken on the message's single
+clock reading. Both run on the same frozen clock, so their taken times can
+be compared exactly for the 12h reports the legacy syntax understands.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clock  # noqa: E402
+from spawn_parser import parse_message, resolve_taken  # noqa: E402
+
+PHT = ZoneInfo("Asia/Manila")
+ZONES = (PHT, ZoneInfo("America/New_York"), ZoneInfo("Asia/Kolkata"), ZoneInfo("Europe/Moscow"))
+
+
+# ---------------- LEGACY PATH ----------------
+LEGACY_LEXER = re.compile(r"(\d{1,2}:\d{2}\s*(?:AM|PM))|([A-Za-z]+)", re.IGNORECASE)
+
+
+def parse_time_string_to_pht(time_str, user_tz):
+    try:
+        parsed = datetime.strptime(time_str.strip().upper(), "%I:%M %p")
+    except ValueError:
+        return None
+
+    now_user = clock.now(user_tz)
+    dt_user = datetime(
+        year=now_user.year,
+        month=now_user.month,
+        day=now_user.day,
+        hour=parsed.hour,
+        minute=parsed.minute,
+        tzinfo=user_tz
+    )
+    if dt_user > now_user + timedelta(hours=12):
+        dt_user -= timedelta(days=1)
+
+    return dt_user.astimezone(PHT)
+
+
+def legacy_taken(content, user_tz):
+    time_str = None
+    for when, _ in LEGACY_LEXER.findall(content):
+        if when and time_str is None:
+            time_str = when.upper()
+    taken = parse_time_string_to_pht(time_str, user_tz) if time_str else None
+    if not taken:
+        taken = clock.now(user_tz).astimezone(PHT)
+    clock.now(PHT)      # the past-spawn check read the clock once more
+    return taken
+
+
+# ---------------- NEW PATH ----------------
+def new_taken(content, user_tz):
+    now = clock.now(PHT)
+    when = parse_message(content).when
+    now_user = now.astimezone(user_tz)
+    return (resolve_taken(when, now_user) if when else now_user).astimezone(PHT)
+
+
+# ---------------- CORPUS ----------------
+TYPES = ("pcard nuc", "bcard crude", "eg", "avg", "tank", "bn", "hb", "bio", "bs snow")
+
+
+def random_time(rng, legacy_only):
+    form = 0 if legacy_only else rng.randrange(7)
+    if form == 0:
+        return f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d} {rng.choice(('am', 'pm', 'AM', 'PM'))}"
+    if form == 1:
+        # strptime's "%I:%M %p" needs the space, so the legacy path read these as "now"
+        return f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}{rng.choice(('am', 'pm'))}"
+    if form == 2:
+        return f"{rng.randint(0, 23)}:{rng.randint(0, 59):02d}"
+    if form == 3:
+        return f"{rng.randint(1, 90)}{rng.choice(('m', ' min', 'mins'))} ago"
+    if form == 4:
+        return f"-{rng.randint(1, 60)}"
+    if form == 5:
+        return f":{rng.randint(0, 59):02d}"
+    return f"{rng.randint(1, 12)}{rng.choice(('pm', ' am'))}"
+
+
+def build_corpus(n, seed, legacy_only):
+    rng = random.Random(seed)
+    reports = []
+    for _ in range(n):
+        parts = [rng.choice(TYPES), random_time(rng, legacy_only)]
+        rng.shuffle(parts)
+        reports.append((" ".join(parts), rng.choice(ZONES)))
+    return reports
+
+
+# ---------------- MEASUREMENT ----------------
+class FrozenClock:
+    def __init__(self, ts):
+        self.ts = ts
+
+    def time(self):
+        return self.ts
+
+    def monotonic(self):
+        return self.ts
+
+
+def per_report(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for content, tz in corpus:
+            fn(content, tz)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(corpus)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--reports", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    clock.install(FrozenClock(datetime(2026, 1, 5, 14, 7, 31, tzinfo=PHT).timestamp()))
+    legacy_corpus = build_corpus(args.reports, args.seed, legacy_only=True)
+    mixed_corpus = build_corpus(args.reports, args.seed, legacy_only=False)
+
+    mismatches = [c for c, tz in legacy_corpus if legacy_taken(c, tz) != new_taken(c, tz)]
+    if mismatches:
+        print(f"!! {len(mismatches)} 12h reports resolve differently, e.g. {mismatches[:3]}")
+    now = clock.now(PHT)
+    read_as_now = {name: sum(1 for c, tz in mixed_corpus if fn(c, tz) == now) / len(mixed_corpus)
+                   for name, fn in (("legacy", legacy_taken), ("new", new_taken))}
+    print(f"corpus: {args.reports} reports per set; mixed set read as \"now\": "
+          f"legacy {read_as_now['legacy']:.0%}, new {read_as_now['new']:.0%}")
+    # The legacy path skips strptime for anything it cannot read, so only the
+    # 12h set, where both paths do the full work, is a like-for-like timing.
+    print(f"{'set':<12} {'legacy µs':>10} {'new µs':>10} {'speedup':>9}")
+    for name, corpus in (("12h only", legacy_corpus), ("mixed", mixed_corpus)):
+        old = per_report(legacy_taken, corpus, args.repeat)
+        new = per_report(new_taken, corpus, args.repeat)
+        print(f"{name:<12} {old * 1e6:>10.2f} {new * 1e6:>10.2f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Startup cost and memory of the full member cache vs lean gateway mode.
+
+    python bench/gateway_cache.py [--guilds 5] [--members 20000] [--messages 2000]
+
+Each mode runs in its own process with LEAN_GATEWAY set accordingly, using
+the ConnectionState the bot itself configures. It replays what the gateway
+sends at startup: GUILD_CREATE for every guild and, when chunking is on, one
+GUILD_MEMBERS_CHUNK per 1000 members. It then builds --messages messages
+from payloads and resolves each author's timezone. Gateway round trips are
+not simulated. Real chunking is also bound by the gateway's 120
+commands/min limit per shard, so the startup column is a lower bound for
+the full mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHUNK_SIZE = 1000
+ROLE_NAMES = ("@everyone", "PH", "US", "IND", "MY", "RU", "TH", "AU", "Raider", "Officer")
+
+
+def role_payload(role_id: int, name: str, position: int) -> dict:
+    return {"id": str(role_id), "name": name, "position": position, "permissions": "0",
+            "color": 0, "hoist": False, "managed": False, "mentionable": False}
+
+
+def member_payload(user_id: int, role_ids: list) -> dict:
+    return {"user": {"id": str(user_id), "username": f"scout{user_id % 100000}", "discriminator": "0",
+                     "avatar": None, "global_name": None},
+            "roles": [str(r) for r in role_ids], "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False, "mute": False, "flags": 0}
+
+
+def guild_payload(guild_id: int, members: int) -> dict:
+    return {"id": str(guild_id), "name": f"guild-{guild_id}", "member_count": members,
+            "roles": [role_payload(guild_id + i, name, i) for i, name in enumerate(ROLE_NAMES)],
+            "channels": [{"id": str(guild_id + 100), "type": 0, "name": "timers", "position": 0,
+                          "permission_overwrites": []}],
+            "members": [], "emojis": [], "stickers": [], "features": [], "threads": [],
+            "voice_states": [], "presences": [], "large": members > 250}
+
+
+def member_roles(guild_id: int, user_id: int) -> list:
+    # One of the seven timezone roles or "Raider", plus "Officer" now and then.
+    roles = [guild_id + 1 + user_id % 8]
+    if user_id % 5 == 0:
+        roles.append(guild_id + 9)
+    return roles
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def measure(args) -> dict:
+    import discord
+    from discord.state import ChunkRequest
+
+    import main
+
+    state = main.bot._connection
+    loop = asyncio.get_running_loop()
+    guild_ids = [(i + 1) << 32 for i in range(args.guilds)]
+
+    rss_start = rss_bytes()
+    started = time.perf_counter()
+    for gid in guild_ids:
+        state._add_guild_from_data(guild_payload(gid, args.members))
+        guild = state._get_guild(gid)
+        main.index_guild_roles(guild)
+        if state._chunk_guilds:
+            request = ChunkRequest(gid, 0, loop, state._get_guild, cache=state.member_cache_flags.joined)
+            state._chunk_requests[request.nonce] = request
+            chunks = (args.members + CHUNK_SIZE - 1) // CHUNK_SIZE
+            for c in range(chunks):
+                ids = range(gid + 10**6 + c * CHUNK_SIZE, gid + 10**6 + min((c + 1) * CHUNK_SIZE, args.members))
+                state.parse_guild_members_chunk({
+                    "guild_id": str(gid), "nonce": request.nonce, "chunk_index": c, "chunk_count": chunks,
+                    "members": [member_payload(uid, member_roles(gid, uid)) for uid in ids],
+                })
+    startup = time.perf_counter() - started
+
+    zones = {}
+    started = time.perf_counter()
+    for n in range(args.messages):
+        gid = guild_ids[n % len(guild_ids)]
+        uid = gid + 10**6 + (n * 7919) % args.members
+        guild = state._get_guild(gid)
+        data = {"id": str(10**18 + n), "channel_id": str(gid + 100), "guild_id": str(gid),
+                "author": member_payload(uid, [])["user"],
+                "member": {k: v for k, v in member_payload(uid, member_roles(gid, uid)).items() if k != "user"},
+                "content": "bn 8:15 pm", "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None,
+                "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+                "attachments": [], "embeds": [], "pinned": False, "type": 0}
+        message = discord.Message(state=state, channel=guild.get_channel(gid + 100), data=data)
+        zone = main.get_member_timezone(message.author).key
+        zones[zone] = zones.get(zone, 0) + 1
+    per_message = (time.perf_counter() - started) / args.messages
+
+    return {
+        "mode": "lean" if main.LEAN_GATEWAY else "full",
+        "startup_s": startup,
+        "rss_mib": (rss_bytes() - rss_start) / 2**20,
+        "cached_members": sum(len(g.members) for g in state.guilds),
+        "message_us": per_message * 1e6,
+        "zones": dict(sorted(zones.items())),
+    }
+
+
+def run_mode(lean: bool, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="gateway-")
+    env = dict(os.environ, LEAN_GATEWAY="1" if lean else "0",
+               TIMER_DB=os.path.join(tmp, "timers.db"), HISTORY_DIR=os.path.join(tmp, "history"))
+    cmd = [sys.executable, __file__, "--child", "--guilds", str(args.guilds),
+           "--members", str(args.members), "--messages", str(args.messages)]
+    out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--guilds", type=int, default=5)
+    ap.add_argument("--members", type=int, default=20000, help="members per guild")
+    ap.add_argument("--messages", type=int, default=2000)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        result = asyncio.run(measure(args))
+        import main
+        main.store.close()
+        main.history.close()
+        print(json.dumps(result))
+        return
+
+    results = [run_mode(False, args), run_mode(True, args)]
+    print(f"{args.guilds} guilds x {args.members:,} members, {args.messages:,} messages\n")
+    print(f"{'mode':<6}{'startup':>10}{'RSS growth':>13}{'cached members':>16}{'message+tz':>12}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['startup_s']:>9.2f}s{r['rss_mib']:>9.1f} MiB"
+              f"{r['cached_members']:>16,}{r['message_us']:>9.1f} µs")
+    same = results[0]["zones"] == results[1]["zones"]
+    print(f"\ntimezones resolved {'identically' if same else 'DIFFERENTLY'}: {results[1]['zones']}")
+
+
+if __name__ == "__main__":
+    main_cli()
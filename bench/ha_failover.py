@@ -0,0 +1,171 @@
+"""Active/standby failover: two bot processes on one store, the leader killed mid-timer.
+
+    python bench/ha_failover.py [--lease 3] [--kill-after 2]
+
+Both children run main with HA=1 against the same TIMER_DB and HISTORY_DIR
+and a short test spawn type. The fake gateway is this parent: it writes every
+message to both children's stdin, as Discord would deliver it to both
+connections, and reads their structured event logs from stdout. After one
+report the leader is SIGKILLed; the standby must take the lease, send the
+@everyone warning and expire the timer on time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+CHANNEL_ID = 10**17 + 5
+# ~31 s respawn, warning due ~10 s after the report (it is sent once the
+# WARN_GATHER_SECONDS window closes), expired 6 s after the spawn
+TEST_TYPE = """
+[types.DRILL]
+kind = "boss"
+name = "Drill"
+hours = 0.0085
+warn_minutes = 0.35
+grace_minutes = 0.1
+"""
+
+
+# ---------------- CHILD (one bot instance) ----------------
+async def child():
+    import events
+    import main
+    from load_test import FakeAuthor, FakeChannel, FakeMessage, RestCounter
+
+    class GatewayChannel(FakeChannel):
+        async def history(self, limit=None):
+            return
+            yield
+
+    channel = GatewayChannel(CHANNEL_ID, RestCounter(0))
+    main.DEFAULT_CHANNELS = (CHANNEL_ID,)
+    main.bot.get_channel = {CHANNEL_ID: channel}.get
+    events.start(stream=sys.stdout)
+    await main.on_ready()
+    while True:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break
+        payload = json.loads(line)
+        await main.on_message(FakeMessage(channel, payload["content"], FakeAuthor(payload["author"])))
+    await main.hand_over()
+
+
+# ---------------- PARENT (fake gateway) ----------------
+class Instance:
+    def __init__(self, name: str, env: dict, log: queue.Queue):
+        self.name = name
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env={**env, "INSTANCE_ID": name}, cwd=ROOT, text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        threading.Thread(target=self._read, args=(log,), daemon=True).start()
+
+    def _read(self, log):
+        for line in self.proc.stdout:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            log.put((time.monotonic(), self.name, entry))
+
+    def send(self, content: str, author: int):
+        if self.proc.poll() is None:
+            self.proc.stdin.write(json.dumps({"content": content, "author": author}) + "\n")
+            self.proc.stdin.flush()
+
+
+class Gateway:
+    def __init__(self):
+        self.log = queue.Queue()
+        self.seen = []
+
+    def wait(self, instance: str, event: str, timeout: float, match=lambda entry: True):
+        """Block until instance logs event, returning (arrival time, entry)."""
+        for at, name, entry in self.seen:
+            if name == instance and entry["event"] == event and match(entry):
+                return at, entry
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                at, name, entry = self.log.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise SystemExit(f"!! {instance} never logged {event} within {timeout:.0f}s")
+                continue
+            self.seen.append((at, name, entry))
+            if name == instance and entry["event"] == event and match(entry):
+                return at, entry
+
+
+def parent(args):
+    tmp = tempfile.mkdtemp(prefix="ha-failover-")
+    catalog = os.path.join(tmp, "spawns.toml")
+    with open(os.path.join(ROOT, "spawns.toml"), encoding="utf-8") as f, open(catalog, "w", encoding="utf-8") as out:
+        out.write(f.read() + TEST_TYPE)
+    env = {
+        **os.environ, "HA": "1", "LEASE_SECONDS": str(args.lease), "SPAWN_CATALOG": catalog,
+        "TIMER_DB": os.path.join(tmp, "timers.db"), "HISTORY_DIR": os.path.join(tmp, "history"),
+        "PYTHONUNBUFFERED": "1",
+    }
+    gateway = Gateway()
+    first = Instance("bot-a", env, gateway.log)
+    gateway.wait("bot-a", "bot.ready", 30)
+    second = Instance("bot-b", env, gateway.log)
+    gateway.wait("bot-b", "gateway.ready", 30)
+
+    for instance in (first, second):
+        instance.send("drill", 4242)
+    gateway.wait("bot-a", "timer.set", 10)
+    gateway.wait("bot-b", "standby.synced", 10, lambda e: e["timers"] >= 1)
+
+    time.sleep(args.kill_after)
+    first.proc.send_signal(signal.SIGKILL)
+    killed = time.monotonic()
+    print(f"killed bot-a (leader) {args.kill_after:.1f}s after the report; lease TTL {args.lease:.1f}s")
+
+    took_over, acquired = gateway.wait("bot-b", "lease.acquired", args.lease * 3)
+    ready, ready_entry = gateway.wait("bot-b", "bot.ready", 10)
+    due, _ = gateway.wait("bot-b", "timer.warned", 30)
+    warned, warning = gateway.wait("bot-b", "warning.sent", 30)
+    expired, _ = gateway.wait("bot-b", "timer.expired", 60, lambda e: e["key"] == "DRILL")
+    print(f"bot-b took the lease   {took_over - killed:6.2f}s after the kill (epoch {acquired['epoch']})")
+    print(f"bot-b ready            {ready - killed:6.2f}s after the kill, {ready_entry['timers']} timer(s) restored")
+    print(f"bot-b warning due      {due - killed:6.2f}s after the kill")
+    print(f"bot-b warning sent     {warned - killed:6.2f}s after the kill  {warning['spawns']}")
+    print(f"bot-b expired DRILL    {expired - killed:6.2f}s after the kill")
+
+    second.proc.stdin.close()
+    second.proc.wait(timeout=10)
+    leaders = {name for _, name, entry in gateway.seen if entry["event"] == "warning.sent"}
+    print(f"warnings sent by       {sorted(leaders)}")
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lease", type=float, default=3.0, help="lease TTL in seconds")
+    ap.add_argument("--kill-after", type=float, default=2.0, help="seconds after the report to kill the leader")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        asyncio.run(child())
+    else:
+        parent(args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,220 @@
+"""Offline load test: synthetic traffic through on_message against a stubbed Discord API.
+
+    python bench/load_test.py [--channels 4] [--rate 20] [--seconds 10]
+                              [--mix 0.5,0.2,0.3] [--rest-ms 40]
+
+--rate is reports/sec per channel. --mix is the fraction of new timers,
+duplicates and ordinary chat. Nothing connects to Discord: main is imported
+without running, get_channel is pointed at local fake channels, and every
+send/edit/delete on them is counted and delayed by --rest-ms.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_ids = itertools.count(10**17)
+
+
+# ---------------- FAKE DISCORD API ----------------
+class RestCounter:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = {}
+
+    async def hit(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeAuthor:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.bot = False
+        self.guild = None
+        self.roles = []             # guild roles, as resolved from a message payload
+        self.display_name = f"scout{user_id % 1000}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id: int):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        await self.channel.rest.hit("edit")
+        return self
+
+    async def delete(self):
+        await self.channel.rest.hit("delete")
+
+
+class FakeMessage(FakePartialMessage):
+    def __init__(self, channel, content: str, author):
+        super().__init__(channel, next(_ids))
+        self.content = content
+        self.author = author
+        self.guild = channel.guild
+        self.mentions = []
+        self.role_mentions = []
+        self.attachments = []
+        self.stickers = []
+        self.reference = None
+        self.webhook_id = None
+        self.type = None
+        self._state = None
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.roles = []
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, rest: RestCounter):
+        self.id = channel_id
+        self.name = f"timers-{channel_id % 1000}"
+        self.guild = FakeGuild(channel_id + 1)
+        self.mention = f"<#{channel_id}>"
+        self.rest = rest
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.hit("send")
+        return FakeMessage(self, content or "", None)
+
+    def get_partial_message(self, message_id: int):
+        return FakePartialMessage(self, message_id)
+
+    async def delete_messages(self, messages):
+        await self.rest.hit("bulk_delete")
+
+
+# ---------------- TRAFFIC ----------------
+TYPES = ("pcard nuc", "pcard ap", "bcard crude", "bcard rb", "eg", "avg", "tank", "bn",
+         "ap", "hb", "bio", "mili", "dock", "factory", "pcard bs up", "bcard dock")
+CHAT = ("lol", "gg wp", "anyone online?", "brb", "the bot is down?", "so much snow",
+        "need one more for the run", "thanks!", "morning all")
+
+
+def make_report(rng, pht, now) -> str:
+    taken = now - timedelta(minutes=rng.randint(0, 60))
+    return f"{rng.choice(TYPES)} {taken.astimezone(pht).strftime('%I:%M %p').lstrip('0')}"
+
+
+async def loop_lag_probe(samples: list, interval: float = 0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run(args):
+    import main
+
+    rng = random.Random(args.seed)
+    rest = RestCounter(args.rest_ms / 1000)
+    channels = {}
+    for _ in range(args.channels):
+        ch = FakeChannel(next(_ids), rest)
+        channels[ch.id] = ch
+        main.register_channel(ch.id, ch.guild.id)
+    main.bot.get_channel = channels.get
+    main.scheduler.start()
+    main.deletion_scheduler.start()
+
+    users = [FakeAuthor(next(_ids)) for _ in range(50)]
+    sent = {cid: [] for cid in channels}   # previously posted reports, for duplicates
+    p_new, p_dup, _ = args.mix
+    latencies, lag = [], []
+    reports = 0
+
+    tracemalloc.start()
+    mem_start = tracemalloc.get_traced_memory()[0]
+    probe = asyncio.create_task(loop_lag_probe(lag))
+
+    interval = 1 / (args.rate * args.channels)
+    deadline = time.perf_counter() + args.seconds
+    order = itertools.cycle(list(channels.values()))
+    while time.perf_counter() < deadline:
+        ch = next(order)
+        r = rng.random()
+        if r < p_new or (r < p_new + p_dup and not sent[ch.id]):
+            content, author = make_report(rng, main.PHT, datetime.now(main.PHT)), rng.choice(users)
+            sent[ch.id].append((content, author))
+            reports += 1
+        elif r < p_new + p_dup:
+            content, author = rng.choice(sent[ch.id])
+            reports += 1
+        else:
+            content, author = rng.choice(CHAT), rng.choice(users)
+        msg = FakeMessage(ch, content, author)
+        start = time.perf_counter()
+        await main.on_message(msg)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+    handler_calls = rest.total
+    await asyncio.sleep(main.BOARD_DEBOUNCE_SECONDS + 0.1)
+    await main.outbox.drain(timeout=args.drain)
+    probe.cancel()
+    mem_end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    print(f"messages        {len(latencies)}  ({reports} reports, {len(latencies) - reports} chat)")
+    print(f"handler p50     {q[49] * 1e6:,.0f} µs")
+    print(f"handler p99     {q[98] * 1e6:,.0f} µs")
+    print(f"REST calls      {rest.total}  {dict(sorted(rest.calls.items()))}")
+    # Calls still queued or shed under overload are owed all the same
+    owed = rest.total + len(main.outbox) + main.outbox.dropped
+    print(f"  per report    {owed / max(reports, 1):.2f}  incl. queued and dropped  (issued while traffic ran: {handler_calls})")
+    print(f"  still queued  {len(main.outbox)}")
+    print(f"  dropped       {main.outbox.dropped}")
+    print(f"live timers     {len(main.timers)}")
+    print(f"memory growth   {(mem_end - mem_start) / 1024:,.0f} KiB")
+    print(f"loop lag p99    {statistics.quantiles(lag, n=100)[98] * 1000:.2f} ms  (max {max(lag) * 1000:.2f} ms)")
+
+    main.scheduler.stop()
+    main.deletion_scheduler.stop()
+    main.store.close()
+    main.history.close()
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=20, help="reports/sec per channel")
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--mix", default="0.5,0.2,0.3", help="new,duplicate,chat fractions")
+    ap.add_argument("--rest-ms", type=float, default=40, help="simulated REST round-trip")
+    ap.add_argument("--drain", type=float, default=10, help="max seconds to wait for the outbox")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    args.mix = [float(x) for x in args.mix.split(",")]
+
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ.setdefault("TIMER_DB", os.path.join(tmp, "timers.db"))
+    os.environ.setdefault("HISTORY_DIR", os.path.join(tmp, "history"))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,311 @@
+"""Replay a recorded channel log through the bot on a simulated clock.
+
+    python bench/replay.py LOG.jsonl [--speed 1000] [--tail 3] [--out events.jsonl] [--events bot.jsonl]
+    python bench/replay.py --generate LOG.jsonl [--hours 6] [--channels 2]
+
+LOG.jsonl holds one message per line:
+
+    {"ts": 1767571200, "channel": 1, "author": 42, "content": "bn 8:15 pm", "roles": ["US"]}
+
+ts is unix seconds or an ISO-8601 string; roles is optional. The bot runs on
+a virtual-time event loop: handlers take no simulated time and every sleep,
+call_later and scheduler deadline jumps straight to its due time, paced at
+--speed simulated seconds per real second (0 = as fast as possible). The run
+continues --tail hours past the last message so pending timers fire. The
+output is the ordered sequence of warnings, auto-extensions, expiries and
+board states, and is identical from run to run for the same log. --events
+also writes the bot's own structured event log (stamped with real time).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import selectors
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from load_test import CHAT, TYPES, FakeAuthor, FakeChannel, FakeMessage, FakePartialMessage, RestCounter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import clock  # noqa: E402
+
+_ids = itertools.count(10**18)
+
+
+# ---------------- LOG ----------------
+def load_log(path: str) -> list:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            ts = row["ts"]
+            if isinstance(ts, str):
+                ts = datetime.fromisoformat(ts).timestamp()
+            entries.append((float(ts), n, int(row["channel"]), int(row["author"]),
+                            row["content"], tuple(row.get("roles", ()))))
+    entries.sort()
+    return entries
+
+
+def generate_log(path: str, hours: float, channels: int, seed: int):
+    from zoneinfo import ZoneInfo
+
+    pht = ZoneInfo("Asia/Manila")
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5, 8, 0, tzinfo=pht)
+    authors = [(1000 + i, rng.choice(((), ("US",), ("IND",), ("PH",)))) for i in range(20)]
+    t = start
+    with open(path, "w", encoding="utf-8") as f:
+        while t < start + timedelta(hours=hours):
+            t += timedelta(seconds=rng.expovariate(1 / 90))
+            author, roles = rng.choice(authors)
+            if rng.random() < 0.6:
+                zone = ZoneInfo({"US": "America/New_York", "IND": "Asia/Kolkata"}.get(roles[0], "Asia/Manila")) if roles else pht
+                taken = (t - timedelta(minutes=rng.randint(0, 20))).astimezone(zone)
+                content = f"{rng.choice(TYPES)} {taken.strftime('%I:%M %p').lstrip('0')}"
+            else:
+                content = rng.choice(CHAT)
+            row = {"ts": round(t.timestamp(), 3), "channel": rng.randint(1, channels),
+                   "author": author, "content": content}
+            if roles:
+                row["roles"] = list(roles)
+            f.write(json.dumps(row) + "\n")
+
+
+# ---------------- VIRTUAL TIME ----------------
+class PacedSelector:
+    """Selector proxy that advances loop time instead of blocking for timeouts."""
+
+    def __init__(self, selector: selectors.BaseSelector, loop):
+        self._selector = selector
+        self._loop = loop
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+    def select(self, timeout=None):
+        if timeout is not None and timeout <= 0:
+            return self._selector.select(0)
+        speed = self._loop.speed
+        real = None if timeout is None else (timeout / speed if speed else 0)
+        started = time.perf_counter()
+        events = self._selector.select(real)
+        if timeout is not None:
+            if events and speed:
+                # Woken early by real I/O (e.g. a thread handing back a result)
+                self._loop.advance(min(timeout, (time.perf_counter() - started) * speed))
+            elif not events:
+                self._loop.advance(timeout)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    def __init__(self, speed: float):
+        super().__init__()
+        self.speed = speed
+        self._virtual = 0.0
+        self._selector = PacedSelector(self._selector, self)
+
+    def time(self) -> float:
+        return self._virtual
+
+    def advance(self, seconds: float):
+        self._virtual += seconds
+
+
+# ---------------- RECORDING CHANNEL ----------------
+class Role:
+    def __init__(self, role_id: int, name: str, position: int):
+        self.id = role_id
+        self.name = name
+        self.position = position
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, at: float, kind: str, channel: int, **fields):
+        self.events.append({"at": round(at), "kind": kind, "channel": channel, **fields})
+
+
+def board_state(embed) -> dict:
+    lines = [embed.description] if embed.description else []
+    for field in embed.fields:
+        lines.append(field.name)
+        lines.extend(f"  {line}" for line in field.value.split("\n"))
+    return {"section": embed.title.rpartition(" · ")[2], "lines": lines}
+
+
+class RecordingPartialMessage(FakePartialMessage):
+    async def edit(self, **kwargs):
+        embed = kwargs.get("embed")
+        if embed is not None and embed.title and embed.title.startswith("📅"):
+            self.channel.recorder.emit(clock.time(), "board", self.channel.log_id, **board_state(embed))
+        return await super().edit(**kwargs)
+
+
+class RecordingChannel(FakeChannel):
+    def __init__(self, channel_id: int, log_id: int, rest: RestCounter, recorder: Recorder):
+        super().__init__(channel_id, rest)
+        self.log_id = log_id
+        self.recorder = recorder
+
+    async def send(self, content=None, **kwargs):
+        embed = kwargs.get("embed")
+        if embed is not None and embed.title and embed.title.startswith("📅"):
+            self.recorder.emit(clock.time(), "board", self.log_id, **board_state(embed))
+        return await super().send(content, **kwargs)
+
+    def get_partial_message(self, message_id: int):
+        return RecordingPartialMessage(self, message_id)
+
+
+def hook_timer_events(main, recorder: Recorder, log_ids: dict):
+    """Wrap the scheduler handlers so each state transition is recorded at its deadline."""
+    warn, extend, expire = main.five_minute_warning, main.extend_card_time, main.cleanup_expired_messages
+
+    def five_minute_warning(timer, now):
+        was = timer.warned
+        warn(timer, now)
+        if timer.warned and not was:
+            recorder.emit((timer.next_spawn - main.spawn_rule(timer.key).warn).timestamp(), "warn",
+                          log_ids[timer.channel_id], key=timer.key)
+
+    def extend_card_time(timer, now):
+        before = timer.next_spawn
+        extend(timer, now)
+        if timer.next_spawn != before:
+            recorder.emit(before.timestamp(), "extend", log_ids[timer.channel_id], key=timer.key,
+                          until=timer.next_spawn.astimezone(main.PHT).strftime("%H:%M"))
+
+    def cleanup_expired_messages(cid, expired):
+        at = max(t.next_spawn + main.spawn_rule(t.key).grace for t in expired)
+        keys = sorted(t.key for t in expired)
+        expire(cid, expired)
+        recorder.emit(at.timestamp(), "expire", log_ids[cid], keys=keys)
+
+    main.five_minute_warning = five_minute_warning
+    main.extend_card_time = extend_card_time
+    main.cleanup_expired_messages = cleanup_expired_messages
+
+
+# ---------------- REPLAY ----------------
+async def replay(args, entries):
+    import main
+
+    recorder = Recorder()
+    roles = {name: Role(next(_ids), name, pos) for pos, name in enumerate(main.ROLE_TIMEZONES, 1)}
+    rest = RestCounter(0)
+    channels, log_ids = {}, {}
+    for log_id in sorted({e[2] for e in entries}):
+        ch = RecordingChannel(next(_ids), log_id, rest, recorder)
+        ch.guild.roles = list(roles.values())
+        channels[log_id] = ch
+        log_ids[ch.id] = log_id
+        main.register_channel(ch.id, ch.guild.id)
+    main.bot.get_channel = {ch.id: ch for ch in channels.values()}.get
+    hook_timer_events(main, recorder, log_ids)
+    main.scheduler.start()
+    main.deletion_scheduler.start()
+
+    authors = {}
+    started = time.perf_counter()
+    for ts, _, log_id, author_id, content, role_names in entries:
+        delay = ts - clock.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        author = authors.get(author_id)
+        if author is None:
+            author = authors[author_id] = FakeAuthor(author_id)
+            author.guild = channels[log_id].guild
+            author.roles = [roles[r] for r in role_names if r in roles]
+        await main.on_message(FakeMessage(channels[log_id], content, author))
+
+    end = entries[-1][0] + args.tail * 3600
+    while len(main.timers) and clock.time() < end:
+        await asyncio.sleep(60)
+    await asyncio.sleep(main.BOARD_DEBOUNCE_SECONDS + 1)
+    await main.outbox.drain(timeout=10)
+    wall = time.perf_counter() - started
+
+    main.scheduler.stop()
+    main.deletion_scheduler.stop()
+    main.store.close()
+    main.history.close()
+
+    # Timer events are stamped with their deadline, which the scheduler may
+    # reach a moment late; a stable sort by time restores the order.
+    events = sorted(recorder.events, key=lambda e: e["at"])
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    for e in events:
+        if out:
+            out.write(json.dumps(e, ensure_ascii=False) + "\n")
+        else:
+            stamp = datetime.fromtimestamp(e["at"], main.PHT).strftime("%m-%d %H:%M:%S")
+            detail = {k: v for k, v in e.items() if k not in ("at", "kind", "channel")}
+            if e["kind"] == "board":
+                detail = detail["section"] + "\n" + "\n".join(f"{'':25}{line}" for line in detail["lines"])
+            print(f"{stamp}  #{e['channel']:<3} {e['kind']:<7} {detail}")
+    if out:
+        out.close()
+
+    span = clock.time() - entries[0][0]
+    kinds = {}
+    for e in events:
+        kinds[e["kind"]] = kinds.get(e["kind"], 0) + 1
+    print(f"\nreplayed        {len(entries)} messages, {span / 3600:.1f} h simulated in {wall:.1f} s "
+          f"({span / wall:,.0f}x)", file=sys.stderr)
+    print(f"events          {dict(sorted(kinds.items()))}", file=sys.stderr)
+    print(f"REST calls      {rest.total}  {dict(sorted(rest.calls.items()))}", file=sys.stderr)
+    print(f"live timers     {len(main.timers)}", file=sys.stderr)
+    for name, size in main.state_sizes().items():
+        print(f"  {name:<13} {size}", file=sys.stderr)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("log", help="JSONL message log (written to, with --generate)")
+    ap.add_argument("--speed", type=float, default=1000, help="simulated seconds per real second, 0 = unpaced")
+    ap.add_argument("--tail", type=float, default=3, help="hours to keep running after the last message")
+    ap.add_argument("--out", help="write events as JSONL here instead of printing a timeline")
+    ap.add_argument("--events", help="write the bot's structured event log here")
+    ap.add_argument("--generate", action="store_true", help="write a synthetic log and exit")
+    ap.add_argument("--hours", type=float, default=6)
+    ap.add_argument("--channels", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    if args.generate:
+        generate_log(args.log, args.hours, args.channels, args.seed)
+        return
+    entries = load_log(args.log)
+    if not entries:
+        sys.exit("empty log")
+
+    tmp = tempfile.mkdtemp(prefix="replay-")
+    os.environ.setdefault("TIMER_DB", os.path.join(tmp, "timers.db"))
+    os.environ.setdefault("HISTORY_DIR", os.path.join(tmp, "history"))
+    os.environ.setdefault("OUTBOX_RATE", "5")
+    loop = VirtualTimeLoop(args.speed)
+    # Start just before the first message so it arrives on time.
+    clock.install(clock.LoopClock(loop, entries[0][0] - 1))
+    if args.events:
+        import events
+        events.start(stream=open(args.events, "w", encoding="utf-8"))
+    with asyncio.Runner(loop_factory=lambda: loop) as runner:
+        runner.run(replay(args, entries))
+    if args.events:
+        events.stop()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,120 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import zlib
+from contextlib import contextmanager
+
+import metrics
+
+# Structured event log: one JSON object per line on stdout. Callers only build
+# a LogRecord and drop it on a bounded queue; a background thread formats and
+# writes it, so a slow log collector never stalls the event loop. When the
+# queue is full, records are dropped and counted rather than waited on.
+
+QUEUE_SIZE = 10_000
+
+correlation_id = contextvars.ContextVar("correlation_id", default=None)
+sample_rates = {}           # event name -> fraction kept; unlisted events are always kept
+
+_logger = logging.getLogger("bot.events")
+_traces = logging.Formatter()
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        event = getattr(record, "event", None)
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "event": event or "log"}
+        cid = getattr(record, "cid", None)
+        if cid is not None:
+            entry["cid"] = cid
+        if event is None:
+            entry["logger"] = record.name
+            entry["msg"] = record.getMessage()
+        else:
+            entry.update(record.fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks or raises: a full queue drops the record and counts it."""
+
+    def prepare(self, record):
+        # Resolve the message, traceback and correlation id here, while they
+        # are live; JSON encoding and the write happen on the writer thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traces.formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "cid"):
+            record.cid = correlation_id.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.EVENTS_DROPPED.inc(event=getattr(record, "event", None) or "log", reason="queue_full")
+
+
+def start(level: int = logging.INFO, stream=None):
+    """Route every logger (discord.py's included) through the queue to a JSON writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+    records = queue.Queue(QUEUE_SIZE)
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    root = logging.getLogger()
+    root.addHandler(DroppingQueueHandler(records))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(records, writer)
+    _listener.start()
+
+
+def stop():
+    """Write out what is still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# ---------------- EMITTING ----------------
+def emit(event: str, level: int = logging.INFO, exc_info: bool = False, **fields):
+    """Record one event; fields must be JSON-friendly (anything else is str()-ed)."""
+    if not _logger.isEnabledFor(level):
+        return
+    rate = sample_rates.get(event)
+    if rate is not None and rate < 1.0 and not _keep(rate):
+        metrics.EVENTS_DROPPED.inc(event=event, reason="sampled")
+        return
+    _logger.log(level, event, exc_info=exc_info,
+                extra={"event": event, "fields": fields, "cid": correlation_id.get()})
+
+
+def _keep(rate: float) -> bool:
+    cid = correlation_id.get()
+    if cid is None:
+        return random.random() < rate
+    # Decided per correlation id, so a sampled message keeps all of its events
+    return zlib.crc32(str(cid).encode()) < rate * 2**32
+
+
+@contextmanager
+def correlate(cid):
+    """Tag every event emitted inside (and in tasks started inside) with cid."""
+    token = correlation_id.set(cid)
+    try:
+        yield
+    finally:
+        correlation_id.reset(token)
@@ -0,0 +1,209 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import Counter
+
+import clock
+
+# ---------------- RECORD LAYOUT ----------------
+# Fixed-width little-endian rows, appended in event order to one file per
+# UTC month (history/2026-10.bin). Spawn keys are interned in keys.txt.
+#   ts        f64  when the event happened (unix seconds)
+#   at        f64  taken time for TAKE, spawn time for EXPIRE
+#   channel   u64
+#   reporter  u64  0 for EXPIRE
+#   key_id    u16  line number in keys.txt
+#   kind      u8
+RECORD = struct.Struct("<ddQQHB5x")
+TAKE = 0
+EXPIRE = 1
+
+_STOP = object()
+
+
+def _bucket(ts: float) -> str:
+    return time.strftime("%Y-%m", time.gmtime(ts))
+
+
+class SpawnHistory:
+    """Append-only spawn history with month-bucketed files and streaming queries."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._keys = []
+        self._key_ids = {}
+        self._keys_read = 0         # bytes of keys.txt already interned
+        self._keys_lock = threading.Lock()
+        with self._keys_lock:
+            self._refresh_keys()
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="spawn-history", daemon=True)
+        self._writer.start()
+
+    def _intern_loaded(self, key: str):
+        self._key_ids[key] = len(self._keys)
+        self._keys.append(key)
+
+    def _refresh_keys(self):
+        """Intern keys another process appended to keys.txt since the last read.
+
+        Under active/standby the directory is shared; a standby that takes over
+        must continue the leader's numbering, not reuse ids it handed out.
+        Callers hold _keys_lock.
+        """
+        try:
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_read)
+                tail = f.read()
+        except FileNotFoundError:
+            return
+        complete = tail.rfind(b"\n") + 1
+        for line in tail[:complete].decode("utf-8").splitlines():
+            self._intern_loaded(line)
+        self._keys_read += complete
+
+    # ---------------- WRITES (non-blocking) ----------------
+    def record(self, kind: int, channel_id: int, key: str, at: float, reporter_id: int = 0, ts: float | None = None):
+        self._queue.put((kind, channel_id, key, at, reporter_id, clock.time() if ts is None else ts))
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._append(batch)
+            if stop:
+                return
+
+    def _key_id(self, key: str) -> int:
+        """Id for key, appending it to keys.txt if no process has yet."""
+        key_id = self._key_ids.get(key)
+        if key_id is not None:
+            return key_id
+        with self._keys_lock:
+            self._refresh_keys()
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = len(self._keys)
+                self._intern_loaded(key)
+                line = (key + "\n").encode("utf-8")
+                with open(self._keys_path, "ab") as f:
+                    f.write(line)
+                self._keys_read += len(line)
+        return key_id
+
+    def _append(self, batch):
+        by_bucket = {}
+        for kind, channel_id, key, at, reporter_id, ts in batch:
+            by_bucket.setdefault(_bucket(ts), []).append(
+                RECORD.pack(ts, at, channel_id, reporter_id, self._key_id(key), kind)
+            )
+        for bucket, rows in by_bucket.items():
+            with open(os.path.join(self.directory, bucket + ".bin"), "ab") as f:
+                f.write(b"".join(rows))
+
+    # ---------------- QUERIES ----------------
+    def _files_since(self, since: float):
+        first = _bucket(since)
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".bin") and name[:-4] >= first:
+                yield os.path.join(self.directory, name)
+
+    @staticmethod
+    def _first_at_or_after(buf, since: float) -> int:
+        """Binary search a bucket for the first record with ts >= since."""
+        lo, hi = 0, len(buf) // RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RECORD.unpack_from(buf, mid * RECORD.size)[0] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo * RECORD.size
+
+    def scan(self, since: float, channel_id: int | None = None, key: str | None = None):
+        """Yield (ts, at, channel, reporter, key_id, kind) rows newer than since."""
+        key_id = None
+        if key is not None:
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                with self._keys_lock:
+                    self._refresh_keys()
+                key_id = self._key_ids.get(key)
+            if key_id is None:
+                return
+        for path in self._files_since(since):
+            size = os.path.getsize(path) // RECORD.size * RECORD.size
+            if not size:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                view = memoryview(buf)[:size]
+                try:
+                    start = self._first_at_or_after(view, since)
+                    for row in RECORD.iter_unpack(view[start:]):
+                        if channel_id is not None and row[2] != channel_id:
+                            continue
+                        if key_id is not None and row[4] != key_id:
+                            continue
+                        yield row
+                finally:
+                    view.release()
+
+    def stats(self, channel_id: int, key: str, since: float, utc_offset: float) -> dict:
+        """Aggregate one key's reports since a point in time.
+
+        utc_offset (seconds) places reports into local hours of the day.
+        """
+        per_hour = [0] * 24
+        reporters = Counter()
+        takes = missed = 0
+        last_take = None
+        for ts, at, _, reporter, _, kind in self.scan(since, channel_id, key):
+            if kind == TAKE:
+                takes += 1
+                per_hour[int((ts + utc_offset) // 3600) % 24] += 1
+                reporters[reporter] += 1
+                last_take = at
+            elif kind == EXPIRE:
+                missed += 1
+        return {
+            "takes": takes,
+            "missed": missed,
+            "per_hour": per_hour,
+            "reporters": reporters.most_common(5),
+            "last_take": last_take,
+        }
+
+    def last_take(self, channel_id: int, key: str, since: float) -> float | None:
+        last = None
+        for _, at, _, _, _, kind in self.scan(since, channel_id, key):
+            if kind == TAKE:
+                last = at
+        return last
+
+
+def predict_next(last_take: float, duration_seconds: float, now: float) -> float:
+    """Next spawn assuming unreported spawns keep cycling every duration."""
+    if last_take + duration_seconds >= now:
+        return last_take + duration_seconds
+    cycles = int((now - last_take) // duration_seconds) + 1
+    return last_take + cycles * duration_seconds
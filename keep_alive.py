@@ -1,15 +1,33 @@
-from flask import Flask
-from threading import Thread
+from aiohttp import web
 
-app = Flask('')
+import metrics
 
-@app.route('/')
-def home():
-    return "Bot is alive!"
+# Health and metrics server running on the bot's own event loop.
+# aiohttp already ships with discord.py, so there is no second framework or thread.
 
-def run():
-    app.run(host='0.0.0.0', port=5000)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+async def home(request):
+    return web.Response(text="Bot is alive!")
+
+
+async def metrics_endpoint(request):
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+async def healthz(request):
+    health = request.app["health"]
+    status = health() if health else {"ready": False}
+    return web.json_response(status, status=200 if status.get("ready") else 503)
+
+
+async def keep_alive(health=None, host: str = "0.0.0.0", port: int = 5000) -> web.AppRunner:
+    """Start the server on the running loop; await runner.cleanup() to stop it."""
+    app = web.Application()
+    app["health"] = health
+    app.router.add_get("/", home)
+    app.router.add_get("/metrics", metrics_endpoint)
+    app.router.add_get("/healthz", healthz)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,69 @@
+import sqlite3
+
+import clock
+
+# ---------------- SCHEMA ----------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lease (
+    name    TEXT    PRIMARY KEY,
+    holder  TEXT,
+    expires REAL    NOT NULL DEFAULT 0,
+    epoch   INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class Lease:
+    """Leadership lease kept in a SQLite file that every instance opens.
+
+    acquire() takes the lease when it is free or expired and renews it when
+    this instance already holds it, in one UPDATE, so two instances can never
+    both succeed. epoch goes up each time the holder changes. holds() runs on
+    another connection inside its write transaction, which fences off
+    writes from an instance that has lost the lease.
+    """
+
+    def __init__(self, path: str, holder: str, ttl: float, name: str = "leader"):
+        self.path = path
+        self.holder = holder
+        self.ttl = ttl
+        self.name = name
+        self.epoch = None           # epoch of the current term, None while not held
+        self.expires = 0.0          # our own view of when the lease lapses
+        self._conn = sqlite3.connect(path, timeout=ttl / 4, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO lease (name) VALUES (?)", (name,))
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; False if another live instance holds it."""
+        now = clock.time()
+        row = self._conn.execute(
+            "UPDATE lease SET epoch = epoch + (holder IS NOT ?1), holder = ?1, expires = ?2 "
+            "WHERE name = ?3 AND (holder = ?1 OR expires <= ?4) RETURNING epoch",
+            (self.holder, now + self.ttl, self.name, now),
+        ).fetchone()
+        if row is None:
+            self.epoch = None
+            return False
+        self.epoch = row[0]
+        self.expires = now + self.ttl
+        return True
+
+    def release(self):
+        """Let the lease lapse now so a standby takes over without waiting out the TTL."""
+        self._conn.execute("UPDATE lease SET expires = 0 WHERE name = ? AND holder = ?", (self.name, self.holder))
+        self.epoch = None
+        self.expires = 0.0
+
+    def holds(self, conn: sqlite3.Connection) -> bool:
+        """True if the lease row, read through conn, names this instance."""
+        row = conn.execute("SELECT holder FROM lease WHERE name = ?", (self.name,)).fetchone()
+        return row is not None and row[0] == self.holder
+
+    def holder_info(self) -> tuple:
+        """(holder, expires, epoch) as stored."""
+        return self._conn.execute("SELECT holder, expires, epoch FROM lease WHERE name = ?", (self.name,)).fetchone()
+
+    def close(self):
+        self._conn.close()
@@ -1,59 +1,41 @@
 import discord
-from discord.ext import commands, tasks
-import re
+from discord.ext import commands
 import asyncio
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import math
 import os
+import re
+import signal
+import socket
+import sqlite3
+import time
+import logging
+from typing import NamedTuple
+
+import clock
+import events
+import metrics
+from history import EXPIRE as HISTORY_EXPIRE, TAKE as HISTORY_TAKE, SpawnHistory, predict_next
+from keep_alive import keep_alive
+from lease import Lease
+from outbox import Outbox, BOARD, CONFIRM, DELETE as DELETE_JOB, EDIT, REMOVE, WARNING
+from scheduler import DeadlineScheduler, COMPACT, DELETE, EXPIRE, EXTEND, WARN
+from spawn_parser import (
+    ParseResult, active_catalog, is_candidate, names_spawn, parse_message, resolve_taken, split_reports, use_catalog,
+)
+from spawns import CATALOG_PATH, Catalog, CatalogError, SpawnRule, load_catalog
+from store import TimerStore
+from timers import SpawnTimer, TimerIndex
+from ttlstore import TTLStore
 
 # ---------------- CONFIG ----------------
-ALLOWED_CHANNELS = [1425720821477015553, 1427263126989963264]
+# Seeded into the channel registry on first run; afterwards managed with !track.
+DEFAULT_CHANNELS = (1425720821477015553, 1427263126989963264)
+SHARD_COUNT = int(os.environ["SHARD_COUNT"]) if os.environ.get("SHARD_COUNT") else None
+SHARD_IDS = [int(i) for i in os.environ["SHARD_IDS"].split(",")] if os.environ.get("SHARD_IDS") else None
 PHT = ZoneInfo("Asia/Manila")
 
-ROOM_NAMES = {
-    "AP": "Airport",
-    "HB": "Harbor",
-    "SHB": "Small Harbor",
-    "BANDIT": "Bandit Camp",
-    "BIO": "Bio-Research Lab",
-    "NUC": "Nuclear Plant",
-    "MILI": "Military Base",
-    "RB": "Rocket Base",
-    "CRUDE": "Crude Oil Base",
-    "BS SNOW": "Snow Mountain Bomb Shelter",
-    "DOCK": "Dock",
-    "FACTORY": "Chemical Factory",
-}
-
-BOSS_NAMES = {
-    "EG": "EG Mutant",
-    "AVG": "Avenger",
-    "TANK": "Tank",
-    "BN": "Bloodnest"
-}
-
-CARD_NAMES = {"PCARD": "Purple Card", "BCARD": "Blue Card"}
-
-CARD_LOCATIONS = {
-    "BS UP": "Bomb Shelter Upper",
-    "BS BOT": "Bomb Shelter Bottom",
-    "BS BOTTOM": "Bomb Shelter Bottom",
-    "AP": "Airport",
-    "HB": "Harbor",
-    "SHB": "Small Harbor",          # FIX: was missing from CARD_LOCATIONS
-    "NUC": "Nuclear Plant",
-    "MILI": "Military Base",
-    "BIO": "Bio-Research Lab",
-    "BANDIT": "Bandit Camp",
-    "RB": "Rocket Base",
-    "CRUDE": "Crude Oil Base",
-    "BS SNOW": "Snow Mountain Bomb Shelter",
-    "DOCK": "Dock",
-    "FACTORY": "Chemical Factory",
-    "ARC": "Abandoned Research Center",
-    "AFC": "Abandoned Factory Center",
-}
-
 ROLE_TIMEZONES = {
     "PH": "Asia/Manila",
     "IND": "Asia/Kolkata",
@@ -64,163 +46,342 @@ ROLE_TIMEZONES = {
     "AU": "Australia/Brisbane"
 }
 
+# Fraction of each high-volume event kept in the structured log; EVENT_SAMPLE
+# ("parse.rejected=0.05,http.response=1") overrides single rates.
+EVENT_SAMPLING = {"parse.rejected": 0.01, "parse.not_report": 0.1, "http.response": 0.05, "board.unchanged": 0.05}
+EVENT_SAMPLING.update(
+    (name.strip(), float(rate))
+    for name, _, rate in (pair.partition("=") for pair in os.environ.get("EVENT_SAMPLE", "").split(",") if pair)
+)
+events.sample_rates.update(EVENT_SAMPLING)
+
 # ---------------- TRACKING ----------------
-user_sent_times = {}
-global_next_spawn = {}      # (channel_id, spawn_key) -> datetime (PHT) of NEXT spawn
-spawn_warned = set()
-upcoming_msg_id = {}
-card_auto_extended = set()
-spawn_origin_time = {}      # original taken time (PHT)
-last_spawn_record = {}
+LAST_SPAWN_TTL = 24 * 3600              # seconds an expired timer's origin is kept
+STALE_DELETION_SECONDS = 24 * 3600      # deletion rows this overdue are orphans; live ones stay armed in memory
+COMPACT_INTERVAL = timedelta(hours=6)   # the leader prunes the journal this often
+COMPACT_KEY = (None, COMPACT)           # that deadline's key on the timer scheduler
+user_sent_times = TTLStore("user_sent", maxsize=50_000)    # (user_id, spawn_key) -> next spawn, until it expires
+last_spawns = TTLStore("last_spawn", maxsize=10_000)       # (channel_id, spawn_key) -> origin of the last expired timer
+timers = TimerIndex()       # per-channel SpawnTimer records and board ids
+
+# ---------------- PERSISTENCE ----------------
+store = TimerStore(os.environ.get("TIMER_DB", "timers.db"))
+history = SpawnHistory(os.environ.get("HISTORY_DIR", "history"))
+state_restored = False     # restore has started (guards reconnects)
+state_ready = False        # timers restored and boards redrawn
+
+# Active/standby: with HA=1 several instances share TIMER_DB and HISTORY_DIR.
+# Only the lease holder runs the schedulers and talks to Discord; the others
+# mirror the store and take over once the lease lapses.
+HA_MODE = os.environ.get("HA", "0") == "1"
+INSTANCE_ID = os.environ.get("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEASE_SECONDS = float(os.environ.get("LEASE_SECONDS", "10"))
+LEASE_POLL_SECONDS = LEASE_SECONDS / 5     # renew well inside the TTL; also the standby's sync period
+lease = Lease(store.path, INSTANCE_ID, LEASE_SECONDS) if HA_MODE else None
+if lease is not None:
+    store.fence = lease.holds
+leader = not HA_MODE
+takeover = None            # become_leader() task of the current term
+synced_seq = None          # store sequence the standby's copy reflects
+
+# ---------------- CHANNEL REGISTRY ----------------
+# Timer state is partitioned per process, not per shard: a process owns a
+# disjoint set of shards, and its shards share one event loop and cache, so
+# memory and gateway load scale by giving each process fewer SHARD_IDS.
+tracked_channels = {}       # channel_id -> guild_id (None until resolved)
+ALLOWED_CHANNELS = set()    # tracked channels owned by this process's shards
+guilds_resolved = False     # after ready, a guild we cannot see is on another process's shards
+
+def shard_for(guild_id: int) -> int:
+    return (guild_id >> 22) % SHARD_COUNT
+
+def owns_guild(guild_id: int | None) -> bool:
+    """True if guild_id is served by one of this process's shards."""
+    if SHARD_COUNT is None or SHARD_IDS is None:
+        return True
+    if guild_id is None:
+        return not guilds_resolved
+    return shard_for(guild_id) in SHARD_IDS
+
+def register_channel(channel_id: int, guild_id: int | None):
+    tracked_channels[channel_id] = guild_id
+    if owns_guild(guild_id):
+        ALLOWED_CHANNELS.add(channel_id)
+    else:
+        ALLOWED_CHANNELS.discard(channel_id)
+
+def load_channels(rows=None):
+    rows = store.load_channels() if rows is None else rows
+    if not rows:
+        rows = [(cid, None) for cid in DEFAULT_CHANNELS]
+        if leader:
+            for cid, gid in rows:
+                store.put_channel(cid, gid)
+    tracked_channels.clear()
+    ALLOWED_CHANNELS.clear()
+    for cid, gid in rows:
+        register_channel(cid, gid)
+
+load_channels()
+
+def persist_timer(timer: SpawnTimer):
+    """Journal the current state of one timer."""
+    store.put_timer(
+        timer.channel_id, timer.key, timer.next_spawn.timestamp(),
+        timer.origin.timestamp() if timer.origin else None,
+        timer.warned, timer.extended,
+    )
+
+def track_timer(channel_id: int, key: str, next_spawn: datetime, origin: datetime) -> SpawnTimer:
+    """Create or overwrite a timer, journal it and arm its deadlines."""
+    timer = timers.set(channel_id, key, next_spawn, origin)
+    if last_spawns.pop((channel_id, key)) is not None:
+        store.delete_last_spawn(channel_id, key)
+    persist_timer(timer)
+    schedule_timer(timer)
+    events.emit("timer.set", channel=channel_id, key=key, next_spawn=next_spawn.isoformat())
+    return timer
+
+def drop_timer(timer: SpawnTimer):
+    timers.remove(timer.channel_id, timer.key)
+    store.delete_timer(timer.channel_id, timer.key)
+    scheduler.cancel(timer.channel_key)
+
+def reset_state():
+    """Forget in-memory state before loading a fresher copy from the store."""
+    timers.clear()
+    last_spawns.clear()
+    user_sent_times.clear()
+    tz_overrides.clear()
+    board_hash.clear()
+    board_queued.clear()
+    warn_batches.clear()
+
+def restore_state(data: dict | None = None, channel_ids: set | None = None) -> set:
+    """Load journaled timers, drop expired ones, return the channel ids to redraw.
+
+    channel_ids limits the restore to some of the owned channels. A standby
+    only mirrors: it leaves expired rows, deletions and compaction to the
+    leader.
+    """
+    global synced_seq
+    data = store.load() if data is None else data
+    synced_seq = data["seq"]
+    owned = ALLOWED_CHANNELS if channel_ids is None else channel_ids & ALLOWED_CHANNELS
+    now = clock.now(PHT)
+    channels = set()
+    for cid, key, next_ts, origin_ts, warned, extended in data["timers"]:
+        if cid not in owned:
+            continue
+        spawn_time = datetime.fromtimestamp(next_ts, PHT)
+        if now >= expires_at(key, spawn_time):
+            if leader:
+                store.delete_timer(cid, key)
+            continue
+        origin = datetime.fromtimestamp(origin_ts, PHT) if origin_ts is not None else None
+        timers.set(cid, key, spawn_time, origin, bool(warned), bool(extended))
+        channels.add(cid)
+    for cid, key, origin_ts in data["last_spawn"]:
+        if cid not in owned:
+            continue
+        last_spawns.set((cid, key), datetime.fromtimestamp(origin_ts, PHT), origin_ts + LAST_SPAWN_TTL)
+    for user_id, key, next_ts in data["user_sent"]:
+        next_spawn = datetime.fromtimestamp(next_ts, PHT)
+        user_sent_times.set((user_id, key), next_spawn, expires_at(key, next_spawn).timestamp())
+    for cid, section, msg_id in data["boards"]:
+        if cid not in owned or section.partition(":")[0] not in BOARD_SECTIONS:
+            continue
+        timers.set_board_id(cid, section, msg_id)
+        channels.add(cid)
+    for user_id, zone in data["tz_overrides"]:
+        tz_overrides[user_id] = zone
+    if not leader:
+        return channels
+    for cid, mid, due in data["deletions"]:
+        if cid in owned:
+            schedule_deletion(cid, mid, due)
+    compact_store()
+    return channels
+
+def compact_store():
+    """Prune journal rows the in-memory stores have already let go, then re-arm.
+
+    Runs on the leader only: at restore and every COMPACT_INTERVAL after.
+    """
+    now = clock.now(PHT)
+    ts = now.timestamp()
+    store.compact((now - active_catalog().max_grace).timestamp(), ts - LAST_SPAWN_TTL, ts - STALE_DELETION_SECONDS)
+    scheduler.schedule(COMPACT_KEY, [(now + COMPACT_INTERVAL, COMPACT)])
 
 # ---------------- BOT SETUP ----------------
+# Lean mode skips the privileged members intent, startup chunking and the
+# member cache; timezone roles are read from the role ids on each message.
+LEAN_GATEWAY = os.environ.get("LEAN_GATEWAY", "1") != "0"
+STARTED = time.perf_counter()
+
 intents = discord.Intents.default()
 intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-
-# ---------------- REGEX / PARSING ----------------
-time_regex = re.compile(r"(?i)(\d{1,2}:\d{2}\s*(?:AM|PM))")
-word_token = re.compile(r"([A-Za-z]+)")
-
-LOCATION_ALIASES = {
-    "BS": "BS BOT",
-    "BSUP": "BS UP",
-    "BSUPPER": "BS UP",
-    "BS BOT": "BS BOT",
-    "BSBOT": "BS BOT",
-    "BOT": "BS BOT",
-    "BOTTOM": "BS BOT",
-    "DOWN": "BS BOT",
-    "BELOW": "BS BOT",
-    "AP": "AP",
-    "AIRPORT": "AP",
-    "HB": "HB",
-    "HARBOR": "HB",
-    "NUC": "NUC",
-    "NUCLEAR": "NUC",
-    "MILI": "MILI",
-    "MILITARY": "MILI",
-    "BIO": "BIO",
-    "BANDIT": "BANDIT",
-    "RB": "RB",
-    "ROCKET": "RB",
-    "ROCKETBASE": "RB",
-    "CRUDE": "CRUDE",
-    "CRUDEOIL": "CRUDE",
-    "CRUDEOILBASE": "CRUDE",
-    "BS SNOW": "BS SNOW",
-    "SNOW": "BS SNOW",
-    "SNOWMOUNTAIN": "BS SNOW",
-    "DOCK": "DOCK",
-    "FACTORY": "FACTORY",
-    "CHEMICALFACTORY": "FACTORY",
-    "SHB": "SHB",
-    "SMALLHARBOR": "SHB",
-    "ARC": "ARC",
-    "AFC": "AFC",
-}
-
-ROOM_KEYS = set(ROOM_NAMES.keys()) | {v.upper() for v in ROOM_NAMES.values()}
-BOSS_KEYS = set(BOSS_NAMES.keys()) | {v.upper() for v in BOSS_NAMES.values()}
-CARD_KEYS = set(CARD_NAMES.keys()) | {v.upper() for v in CARD_NAMES.values()}
-
-
-# ---------------- DURATION HELPER ----------------
-def get_duration_hours(spawn_key: str) -> float:
-    """Return the respawn duration in hours for a given spawn_key."""
-    if spawn_key in ROOM_NAMES:
-        return 2.0
-    if spawn_key == "BN":
-        return 3.0
-    if spawn_key in BOSS_NAMES:
-        return 6.0
-    if spawn_key.startswith("PCARD"):
-        return 3.0
-    if spawn_key.startswith("BCARD"):
-        return 2.5
-    # Fallback — log unexpected keys so they're visible
-    print(f"[WARN] Unknown spawn_key '{spawn_key}', defaulting duration to 2h")
-    return 2.0
-
-
-# ---------------- HELPERS ----------------
-def get_member_timezone(member: discord.Member) -> ZoneInfo:
-    for role in member.roles:
-        key = role.name.upper()
-        if key in ROLE_TIMEZONES:
-            return ZoneInfo(ROLE_TIMEZONES[key])
-    return PHT
-
-def parse_time_string_to_pht(time_str: str, user_tz: ZoneInfo) -> datetime | None:
+intents.members = not LEAN_GATEWAY
+bot = commands.AutoShardedBot(
+    command_prefix="!", intents=intents, help_command=None,
+    shard_count=SHARD_COUNT, shard_ids=SHARD_IDS,
+    chunk_guilds_at_startup=not LEAN_GATEWAY,
+    member_cache_flags=(
+        discord.MemberCacheFlags.none() if LEAN_GATEWAY else discord.MemberCacheFlags.from_intents(intents)
+    ),
+)
+startup_seconds = None      # process start to first on_ready
+
+# ---------------- INSTRUMENTATION ----------------
+def instrument_http(http):
+    """Time and count every outbound REST call made through discord.py's HTTP client."""
+    original = http.request
+
+    async def request(route, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await original(route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        finally:
+            label = f"{route.method} {route.path}"
+            elapsed = time.perf_counter() - started
+            metrics.REST_SECONDS.observe(elapsed, method=label)
+            metrics.REST_CALLS.inc(method=label, status=status)
+            if status == "ok":
+                events.emit("http.response", route=label, ms=round(elapsed * 1000, 1))
+            else:
+                events.emit("http.error", logging.WARNING, route=label, status=status, ms=round(elapsed * 1000, 1))
+
+    http.request = request
+
+class RateLimitCounter(logging.Handler):
+    """discord.py retries 429s internally and only logs them; count those log lines."""
+
+    def emit(self, record):
+        if "responded with 429" in str(record.msg):
+            metrics.RATE_LIMITS.inc()
+
+instrument_http(bot.http)
+logging.getLogger("discord.http").addHandler(RateLimitCounter(logging.WARNING))
+
+metrics.Gauge(
+    "bot_live_timers", "Live timers per channel", ("channel",),
+    fn=lambda: {(str(cid),): n for cid, n in timers.counts().items()},
+)
+metrics.Gauge(
+    "bot_gateway_latency_seconds", "Heartbeat latency per shard", ("shard",),
+    fn=lambda: {(str(sid),): lat for sid, lat in bot.latencies if lat == lat},
+)
+
+def resident_bytes() -> int | None:
+    """Current RSS of this process, where /proc is available."""
     try:
-        parsed = datetime.strptime(time_str.strip().upper(), "%I:%M %p")
-    except ValueError:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
         return None
 
-    now_user = datetime.now(user_tz)
-    dt_user = datetime(
-        year=now_user.year,
-        month=now_user.month,
-        day=now_user.day,
-        hour=parsed.hour,
-        minute=parsed.minute,
-        tzinfo=user_tz
-    )
-    if dt_user > now_user + timedelta(hours=12):
-        dt_user -= timedelta(days=1)
-
-    return dt_user.astimezone(PHT)
-
-def normalize_token(tok: str) -> str:
-    return re.sub(r'[^A-Za-z]', '', tok).upper()
-
-def find_time_keyword_location(message: str):
-    s = message
-    time_m = time_regex.search(s)
-    time_str = time_m.group(1).upper() if time_m else None
-
-    tokens = [normalize_token(t) for t in word_token.findall(s)]
-    type_key = None
-    location_key = None
+def state_sizes() -> dict:
+    """Entry counts and approximate bytes of the in-memory state stores."""
+    sizes = {ttl.name: ttl.stats() for ttl in (user_sent_times, last_spawns)}
+    sizes["role_zones"] = {"entries": sum(len(z) for z in role_zones.values())}
+    sizes["members"] = {"entries": sum(len(g.members) for g in bot.guilds)}
+    sizes["timers"] = {"entries": len(timers)}
+    return sizes
+
+metrics.Gauge(
+    "bot_state_entries", "Entries held in each in-memory state store", ("store",),
+    fn=lambda: {(name,): s["entries"] for name, s in state_sizes().items()},
+)
+metrics.Gauge(
+    "bot_state_bytes", "Approximate bytes held by each TTL store", ("store",),
+    fn=lambda: {(name,): s["bytes"] for name, s in state_sizes().items() if "bytes" in s},
+)
+metrics.Gauge(
+    "process_resident_memory_bytes", "Resident set size",
+    fn=lambda: {(): resident_bytes() or 0},
+)
+
+def health() -> dict:
+    """Snapshot served on /healthz."""
+    next_deadline = scheduler.next_deadline()
+    overdue = max(clock.time() - next_deadline, 0.0) if next_deadline else 0.0
+    latency = bot.latency
+    return {
+        # A synced standby is healthy too; it just is not the one sending
+        "ready": bot.is_ready() and (state_ready or (not leader and synced_seq is not None)),
+        "role": "leader" if leader else "standby",
+        "gateway_latency_ms": round(latency * 1000, 1) if latency == latency else None,
+        "scheduler_running": scheduler.running,
+        "scheduler_lag_s": round(scheduler.lag, 3),
+        "scheduler_overdue_s": round(overdue, 3),
+        "live_timers": len(timers),
+        "startup_s": round(startup_seconds, 2) if startup_seconds is not None else None,
+    }
 
-    for t in tokens:
-        if t in CARD_KEYS:
-            type_key = t
-            break
-    if not type_key:
-        for t in tokens:
-            if t in BOSS_KEYS:
-                type_key = t
-                break
-    if not type_key and "BLOOD" in tokens:
-        type_key = "BN"
-    if not type_key:
-        for t in tokens:
-            if t in ROOM_KEYS:
-                type_key = t
-                break
-
-    for i in range(len(tokens)-1, -1, -1):
-        two = (tokens[i-1] + " " + tokens[i]) if i-1 >= 0 else tokens[i]
-        if two in LOCATION_ALIASES:
-            location_key = LOCATION_ALIASES[two]
-            break
-        if tokens[i] in LOCATION_ALIASES:
-            location_key = LOCATION_ALIASES[tokens[i]]
-            break
+# ---------------- SPAWN RULES ----------------
+def spawn_rule(spawn_key: str) -> SpawnRule:
+    """Duration, grace, warning and auto-extend rule for a timer key (O(1))."""
+    return active_catalog().rule(spawn_key)
+
+def expires_at(spawn_key: str, next_spawn: datetime) -> datetime:
+    return next_spawn + spawn_rule(spawn_key).grace
+
+def apply_catalog(catalog: Catalog):
+    """Swap in a reloaded catalog. Live timers keep their spawn times and are
+    re-armed under the new warning/grace/extend rules."""
+    use_catalog(catalog)
+    for timer in timers:
+        schedule_timer(timer)
+    for cid in timers.channel_ids():
+        channel = bot.get_channel(cid)
+        if channel:
+            request_board_update(channel)
 
-    if type_key:
-        tk = type_key
-        rev_room = {v.upper(): k for k, v in ROOM_NAMES.items()}
-        rev_boss = {v.upper(): k for k, v in BOSS_NAMES.items()}
-        if tk in rev_room:
-            type_key = rev_room[tk]
-        elif tk in rev_boss:
-            type_key = rev_boss[tk]
 
-    return time_str, type_key, location_key
+# ---------------- HELPERS ----------------
+# ---------------- TIMEZONE ROLES ----------------
+ZONES = {name: ZoneInfo(name) for name in set(ROLE_TIMEZONES.values())}
+role_zones = {}             # guild_id -> {role_id: (position, ZoneInfo)} for timezone roles
+tz_overrides = {}           # member_id -> zone name set with !tz
+
+def get_zone(name: str) -> ZoneInfo:
+    """Return the shared ZoneInfo for name; raises for unknown zones."""
+    zone = ZONES.get(name)
+    if zone is None:
+        zone = ZONES[name] = ZoneInfo(name)
+    return zone
+
+def index_guild_roles(guild: discord.Guild):
+    """Precompute which of a guild's roles are timezone roles."""
+    role_zones[guild.id] = {
+        role.id: (role.position, get_zone(ROLE_TIMEZONES[role.name.upper()]))
+        for role in guild.roles
+        if role.name.upper() in ROLE_TIMEZONES
+    }
 
+def get_member_timezone(member: discord.Member) -> ZoneInfo:
+    name = tz_overrides.get(member.id)
+    if name is not None:
+        return get_zone(name)
+    guild = getattr(member, "guild", None)
+    if guild is None:
+        return PHT
+    zones = role_zones.get(guild.id)
+    if zones is None:
+        index_guild_roles(guild)
+        zones = role_zones[guild.id]
+    # member.roles resolves the payload's role ids through the guild role
+    # cache, which lean mode keeps; the lowest-positioned timezone role wins.
+    best = None
+    for role in getattr(member, "roles", ()):
+        hit = zones.get(role.id)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+    return best[1] if best else PHT
 
 # ---------------- EMBED HELPERS ----------------
 GOLD = 0xD4AF37
@@ -230,165 +391,686 @@ def build_embed(title: str, description: str, fields: dict, color: int = GOLD):
     embed = discord.Embed(title=title, description=description, color=color)
     for name, value in fields.items():
         embed.add_field(name=name, value=value, inline=False)
-    embed.timestamp = datetime.now(tz=timezone.utc)
+    embed.timestamp = clock.now(timezone.utc)
     return embed
 
 def unix_ts(dt: datetime) -> int:
     return int(dt.astimezone(timezone.utc).timestamp())
 
-def build_upcoming_embed(channel: discord.TextChannel):
-    embed = discord.Embed(title=f"📅 Upcoming Spawns — {channel.name}", color=0x111111)
-    rooms, bosses, cards = [], [], []
-    now = datetime.now(PHT)
-
-    for (cid, key), spawn_time in list(global_next_spawn.items()):
-        if cid != channel.id:
-            continue
-
-        # FIX: correctly compute expire_time per category
-        duration = get_duration_hours(key)
-        # spawn_time here is the NEXT spawn time (already offset from taken time)
-        # The entry expires when that spawn window closes (spawn_time + a grace period)
-        expire_time = spawn_time + timedelta(minutes=10)
-
-        if now >= expire_time:
-            continue
-
-        taken = spawn_origin_time.get((cid, key))
-        taken_str = taken.strftime("%I:%M %p") if taken else "?"
-        spawn_str = spawn_time.strftime("%I:%M %p").lstrip("0")
-        line = f"**{key.replace('_', ' ')}** — spawns <t:{unix_ts(spawn_time)}:t> (spawns at {spawn_str} PHT)"
-
-        if key in ROOM_NAMES:
-            rooms.append(line)
-        elif key in BOSS_NAMES:
-            bosses.append(line)
+BOARD_TITLE = "📅 Upcoming Spawns"
+BOARD_SECTIONS = {"room": "🏠 Rooms", "boss": "🛡️ Bosses", "card": "🎴 Cards"}
+BOARD_BUCKET_HOURS = 3
+FIELD_LIMIT = 1024          # characters per embed field
+EMBED_FIELDS = 25           # fields per embed
+EMBED_BUDGET = 5500         # characters per embed; Discord allows 6000 including the title
+
+# The board is one message per category ("section"); a category that outgrows
+# one embed continues in "card:1", "card:2"... Inside a section, each field
+# holds the spawns of one time bucket, so an update re-sends only the sections
+# whose content changed.
+
+def board_line(timer: SpawnTimer) -> str:
+    # next_spawn is the NEXT spawn time (already offset from taken time)
+    spawn_time = timer.next_spawn
+    spawn_str = spawn_time.astimezone(PHT).strftime("%I:%M %p").lstrip("0")
+    line = f"**{timer.key.replace('_', ' ')}** — spawns <t:{unix_ts(spawn_time)}:t> (spawns at {spawn_str} PHT)"
+    if timer.extended:
+        line += " · auto-extended"
+    return line
+
+def bucket_label(spawn_time: datetime) -> str:
+    local = spawn_time.astimezone(PHT)
+    start = local.replace(hour=local.hour - local.hour % BOARD_BUCKET_HOURS, minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=BOARD_BUCKET_HOURS)
+    return f"🕒 {start:%a} {start:%I %p} – {end:%I %p} PHT".replace(" 0", " ")
+
+def chunk_lines(lines: list, limit: int = FIELD_LIMIT) -> list:
+    """Join lines into values of at most `limit` characters without splitting a line."""
+    chunks, current = [], ""
+    for line in lines:
+        if current and len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = line
         else:
-            cards.append(line)
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+def section_title(channel: discord.TextChannel, section: str) -> str:
+    kind, _, page = section.partition(":")
+    title = f"{BOARD_TITLE} — {channel.name} · {BOARD_SECTIONS[kind]}"
+    return title if page == "0" else f"{title} ({int(page) + 1})"
+
+def build_board_sections(channel: discord.TextChannel) -> dict:
+    """Section id -> embed, in display order; every category has at least its page 0."""
+    now = clock.now(PHT)
+    buckets = {kind: {} for kind in BOARD_SECTIONS}     # kind -> bucket label -> lines
+
+    for timer in timers.channel(channel.id):
+        # The entry expires when its spawn window closes (spawn_time + a grace period)
+        if now >= expires_at(timer.key, timer.next_spawn):
+            continue
+        lines = buckets[spawn_rule(timer.key).kind].setdefault(bucket_label(timer.next_spawn), [])
+        lines.append(board_line(timer))
+
+    sections = {}
+    for kind, by_bucket in buckets.items():
+        pages, size = [[]], 0
+        for label, lines in by_bucket.items():
+            for n, value in enumerate(chunk_lines(lines)):
+                name = label if n == 0 else f"{label} (cont.)"
+                if pages[-1] and (len(pages[-1]) == EMBED_FIELDS or size + len(name) + len(value) > EMBED_BUDGET):
+                    pages.append([])
+                    size = 0
+                pages[-1].append((name, value))
+                size += len(name) + len(value)
+        for page, fields in enumerate(pages):
+            section = f"{kind}:{page}"
+            embed = discord.Embed(title=section_title(channel, section), color=0x111111)
+            for name, value in fields:
+                embed.add_field(name=name, value=value, inline=False)
+            if not fields:
+                embed.description = "None tracked."
+            sections[section] = embed
+    return sections
+
+BOARD_DEBOUNCE_SECONDS = 2.0
+board_hash = {}        # channel_id -> {section: hash of the last content sent}
+board_queued = {}      # channel_id -> {section: hash of content queued or in flight, not yet sent}
+board_pending = {}     # channel_id -> debounced refresh task
+board_stats = {"requested": 0, "coalesced": 0, "unchanged": 0, "edits": 0, "sends": 0}
+
+def request_board_update(channel: discord.TextChannel):
+    """Queue a board refresh; bursts inside the debounce window merge into one edit."""
+    board_stats["requested"] += 1
+    if channel.id in board_pending:
+        board_stats["coalesced"] += 1
+        return
+    board_pending[channel.id] = asyncio.create_task(flush_board_update(channel))
 
-    if rooms:
-        embed.add_field(name="🏠 Rooms", value="\n".join(rooms), inline=False)
-    if bosses:
-        embed.add_field(name="🛡️ Bosses", value="\n".join(bosses), inline=False)
-    if cards:
-        embed.add_field(name="🎴 Cards", value="\n".join(cards), inline=False)
-    if not rooms and not bosses and not cards:
-        embed.description = "No upcoming spawns tracked."
+async def flush_board_update(channel: discord.TextChannel):
+    try:
+        await asyncio.sleep(BOARD_DEBOUNCE_SECONDS)
+    finally:
+        board_pending.pop(channel.id, None)
+    await update_upcoming_message(channel)
 
-    return embed
+def rest_calls_saved() -> int:
+    # The old path cost a fetch + edit per request. A coalesced refresh skips
+    # both, an unchanged section skips its one edit, and every edit through a
+    # PartialMessage skips the fetch.
+    return 2 * board_stats["coalesced"] + board_stats["unchanged"] + board_stats["edits"]
 
 async def update_upcoming_message(channel: discord.TextChannel):
-    embed = build_upcoming_embed(channel)
-    if channel.id in upcoming_msg_id:
+    with metrics.BOARD_RENDER_SECONDS.time():
+        render_board(channel)
+
+def render_board(channel: discord.TextChannel):
+    """Queue an edit for every section whose content changed; returns immediately."""
+    posted = timers.board_ids(channel.id)
+    hashes = board_hash.get(channel.id, {})
+    queued = board_queued.setdefault(channel.id, {})
+    sections = build_board_sections(channel)
+    for section, embed in sections.items():
+        if section not in posted and not embed.fields:
+            continue        # empty category that never had a message
+        digest = hash(repr(embed.to_dict()))
+        # Compare with what the board will show once queued writes land, not what it shows now
+        if queued.get(section, hashes.get(section)) == digest:
+            board_stats["unchanged"] += 1
+            events.emit("board.unchanged", channel=channel.id, section=section)
+            continue
+        queued[section] = digest
+        outbox.submit(channel.id, BOARD, lambda s=section, e=embed, d=digest: write_section(channel, s, e, d),
+                      key=("board", channel.id, section),
+                      on_drop=lambda s=section, d=digest: unqueue_section(channel.id, s, d))
+    for section in posted.keys() - sections.keys():
+        queued.pop(section, None)
+        outbox.submit(channel.id, BOARD, lambda s=section: retire_section(channel, s), route=REMOVE,
+                      key=("board", channel.id, section))
+
+def unqueue_section(channel_id: int, section: str, digest: int):
+    queued = board_queued.get(channel_id, {})
+    if queued.get(section) == digest:
+        del queued[section]
+
+async def write_section(channel: discord.TextChannel, section: str, embed: discord.Embed, digest: int):
+    try:
+        await put_section(channel, section, embed, digest)
+    finally:
+        unqueue_section(channel.id, section, digest)
+
+async def put_section(channel: discord.TextChannel, section: str, embed: discord.Embed, digest: int):
+    if channel.id not in ALLOWED_CHANNELS:
+        return
+    hashes = board_hash.setdefault(channel.id, {})
+    if hashes.get(section) == digest:
+        board_stats["unchanged"] += 1
+        return
+    message_id = timers.board_ids(channel.id).get(section)
+    if message_id is not None:
         try:
-            msg = await channel.fetch_message(upcoming_msg_id[channel.id])
-            await msg.edit(embed=embed)
+            await channel.get_partial_message(message_id).edit(embed=embed)
+            board_stats["edits"] += 1
+            hashes[section] = digest
+            events.emit("board.edited", channel=channel.id, section=section, fields=len(embed.fields))
             return
         except discord.NotFound:
-            pass
+            events.emit("board.missing", logging.WARNING, channel=channel.id, section=section, message=message_id)
     msg = await channel.send(embed=embed)
-    upcoming_msg_id[channel.id] = msg.id
+    board_stats["sends"] += 1
+    hashes[section] = digest
+    timers.set_board_id(channel.id, section, msg.id)
+    store.put_board(channel.id, section, msg.id)
+    events.emit("board.sent", channel=channel.id, section=section, message=msg.id, fields=len(embed.fields))
+
+async def retire_section(channel: discord.TextChannel, section: str):
+    """Delete an overflow page the category no longer needs."""
+    message_id = timers.board_ids(channel.id).get(section)
+    if message_id is None:
+        return
+    timers.set_board_id(channel.id, section, None)
+    store.delete_board(channel.id, section)
+    board_hash.get(channel.id, {}).pop(section, None)
+    await delete_quietly(channel.get_partial_message(message_id))
+    events.emit("board.retired", channel=channel.id, section=section, message=message_id)
+
+
+# ---------------- OUTBOX ----------------
+outbox = Outbox(rate=float(os.environ.get("OUTBOX_RATE", "1.0")), burst=5)
+if HA_MODE:
+    outbox.halt()           # until this instance holds the lease
+
+async def send_notice(channel: discord.TextChannel, delete_after: int, **kwargs):
+    msg = await channel.send(**kwargs)
+    queue_deletion(msg, delete_after)
+
+def post_notice(channel: discord.TextChannel, priority: int, delete_after: int, **kwargs):
+    """Queue a self-deleting bot message; returns immediately."""
+    outbox.submit(channel.id, priority, lambda: send_notice(channel, delete_after, **kwargs))
+
+async def delete_quietly(message: discord.Message):
+    try:
+        await message.delete()
+    except (discord.NotFound, discord.Forbidden):
+        pass
+
+def post_delete(message: discord.Message):
+    cid = message.channel.id
+    outbox.submit(cid, DELETE_JOB, lambda: delete_quietly(message),
+                  on_drop=lambda: retry_deletion(cid, (message.id,)))
+
+metrics.Gauge(
+    "bot_outbox_depth", "Queued outbound REST jobs", ("priority",),
+    fn=lambda: {(name,): n for name, n in outbox.depth().items()},
+)
+
+
+# ---------------- BOARD RECONCILER ----------------
+# Without a timer database (fresh disk), the last board the bot posted in a
+# channel is the only record of its timers; read them back from its sections.
+BOARD_SCAN_LIMIT = 200          # messages of history searched per channel
+BOARD_SCAN_CONCURRENCY = 4
+BOARD_LINE = re.compile(r"\*\*(.+?)\*\* — spawns <t:(\d+):t>.*?( · auto-extended)?$")
+BOARD_SECTION_TITLE = re.compile(r" · (.+?)(?: \((\d+)\))?$")
+SECTION_KINDS = {label: kind for kind, label in BOARD_SECTIONS.items()}
+
+def parse_board(embed: discord.Embed) -> list:
+    """(spawn_key, next_spawn, extended) for every timer line of a board embed."""
+    rules = active_catalog().rules
+    entries = []
+    for field in embed.fields:
+        for line in (field.value or "").split("\n"):
+            m = BOARD_LINE.match(line)
+            if m:
+                # Type keys may contain spaces ("BS SNOW"); card keys use underscores
+                key = m[1] if m[1] in rules else m[1].replace(" ", "_")
+                entries.append((key, datetime.fromtimestamp(int(m[2]), PHT), m[3] is not None))
+    return entries
+
+def board_section(title: str) -> str | None:
+    """Section id of a board message, from its title."""
+    if not title.startswith(BOARD_TITLE):
+        return None
+    m = BOARD_SECTION_TITLE.search(title)
+    if m is None:
+        return "room:0"     # single-message board from before the split
+    kind = SECTION_KINDS.get(m[1])
+    if kind is None:
+        return None
+    return f"{kind}:{int(m[2]) - 1 if m[2] else 0}"
+
+async def find_boards(channel: discord.TextChannel) -> dict:
+    """The bot's newest message for each board section in the channel's recent history."""
+    found = {}
+    try:
+        async for msg in channel.history(limit=BOARD_SCAN_LIMIT):
+            if msg.author.id == bot.user.id and msg.embeds:
+                section = board_section(msg.embeds[0].title or "")
+                if section is not None:
+                    found.setdefault(section, msg)
+    except (discord.Forbidden, discord.HTTPException) as e:
+        events.emit("board.scan_failed", logging.WARNING, channel=channel.id, error=str(e))
+    return found
+
+async def reconcile_boards(channel_ids) -> set:
+    """Re-attach boards (and the timers they list) for channels with no stored board."""
+    targets = [cid for cid in channel_ids if not timers.board_ids(cid) and bot.get_channel(cid)]
+    limit = asyncio.Semaphore(BOARD_SCAN_CONCURRENCY)
+
+    async def scan(cid):
+        async with limit:
+            return await find_boards(bot.get_channel(cid))
+
+    found = await asyncio.gather(*(scan(cid) for cid in targets))
+    now = clock.now(PHT)
+    recovered = set()
+    for cid, messages in zip(targets, found):
+        if not messages:
+            continue
+        recovered.add(cid)
+        for section, msg in messages.items():
+            timers.set_board_id(cid, section, msg.id)
+            store.put_board(cid, section, msg.id)
+            for key, next_spawn, extended in parse_board(msg.embeds[0]):
+                rule = spawn_rule(key)
+                if timers.get(cid, key) is not None or now >= next_spawn + rule.grace:
+                    continue
+                origin = next_spawn - rule.duration - (rule.extend if extended and rule.extend else timedelta())
+                warned = now >= next_spawn - rule.warn   # assume the warning already went out
+                persist_timer(timers.set(cid, key, next_spawn, origin, warned, extended))
+    if recovered:
+        events.emit("board.recovered", channels=sorted(recovered), timers=sum(len(timers.channel(cid)) for cid in recovered))
+    return recovered
 
 
 # ---------------- TASKS ----------------
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    cleanup_expired_messages.start()
-    five_minute_warning.start()
-    extend_card_time.start()
-
-@tasks.loop(seconds=60)
-async def five_minute_warning():
-    now = datetime.now(PHT)
-    for (cid, key), spawn_time in list(global_next_spawn.items()):
-        if (cid, key) in spawn_warned:
-            continue
-        # FIX: skip if the entry no longer exists (race with cleanup)
-        if (cid, key) not in global_next_spawn:
+    global state_restored
+    events.emit("gateway.ready", user=str(bot.user), guilds=len(bot.guilds))
+    if not state_restored:
+        state_restored = True
+        if HA_MODE:
+            asyncio.create_task(hold_lease())
+        else:
+            await become_leader()
+    if leader and state_ready:
+        # No-ops while already running, so reconnects never stack a second loop
+        scheduler.start()
+        deletion_scheduler.start()
+
+async def become_leader():
+    """Load the freshest journaled state, redraw boards and start sending."""
+    global leader, state_ready, startup_seconds
+    leader = True
+    outbox.resume()
+    data = store.load()
+    load_channels(data["channels"])
+    resolve_channel_guilds()
+    reset_state()
+    redraw = restore_state(data)
+    redraw |= await reconcile_boards(sorted(ALLOWED_CHANNELS))
+    channels = [bot.get_channel(cid) for cid in redraw]
+    for timer in timers:
+        schedule_timer(timer)
+    await asyncio.gather(
+        *(update_upcoming_message(ch) for ch in channels if ch),
+        return_exceptions=True,
+    )
+    state_ready = True
+    scheduler.start()
+    deletion_scheduler.start()
+    if startup_seconds is None:
+        startup_seconds = time.perf_counter() - STARTED
+        rss = resident_bytes()
+        events.emit("bot.ready", startup_s=round(startup_seconds, 2), gateway="lean" if LEAN_GATEWAY else "full",
+                    rss_mib=round(rss / 2**20) if rss is not None else None, timers=len(timers))
+
+def step_down():
+    """Stop acting on state this instance no longer owns; queued REST calls are dropped."""
+    global leader, state_ready
+    leader = state_ready = False
+    if takeover is not None:
+        takeover.cancel()
+    scheduler.stop()
+    scheduler.clear()
+    deletion_scheduler.stop()
+    deletion_scheduler.clear()
+    pending_deletions.clear()
+    outbox.halt()
+    for task in board_pending.values():
+        task.cancel()
+    board_pending.clear()
+
+def sync_standby():
+    """Reload the mirrored state if the leader has committed anything since the last load."""
+    if store.sequence() == synced_seq:
+        return
+    data = store.load()
+    load_channels(data["channels"])
+    reset_state()
+    restore_state(data)
+    events.emit("standby.synced", seq=synced_seq, timers=len(timers))
+
+async def hold_lease():
+    """Renew the lease while leader, or mirror the store until it can be taken.
+
+    Takeover runs as its own task so renewals keep going while boards are
+    reconciled and redrawn.
+    """
+    global leader, takeover
+    while True:
+        try:
+            held = await asyncio.to_thread(lease.acquire)
+        except sqlite3.Error as e:
+            # A busy or unreadable store: keep leading only while our last renewal is still good
+            held = leader and clock.time() < lease.expires
+            events.emit("lease.renew_failed", logging.WARNING, error=str(e), held=held)
+        if held and not leader:
+            events.emit("lease.acquired", instance=INSTANCE_ID, epoch=lease.epoch)
+            leader = True
+            takeover = asyncio.create_task(become_leader())
+        elif not held and leader:
+            step_down()
+            events.emit("lease.lost", logging.WARNING, instance=INSTANCE_ID)
+        if not leader:
+            try:
+                sync_standby()
+            except sqlite3.Error as e:
+                events.emit("standby.sync_failed", logging.WARNING, error=str(e))
+        await asyncio.sleep(LEASE_POLL_SECONDS)
+
+def resolve_channel_guilds() -> set:
+    """Fill in guild ids for channels registered without one (e.g. the seeds).
+
+    Channels still unresolved are then on another process's shards and drop
+    out of ALLOWED_CHANNELS. Returns the channels that became owned.
+    """
+    global guilds_resolved
+    guilds_resolved = True
+    adopted = set()
+    for cid, gid in list(tracked_channels.items()):
+        if gid is not None:
             continue
-        secs = (spawn_time - now).total_seconds()
-        if 0 <= secs <= 300:
-            channel = bot.get_channel(cid)
-            if not channel:
-                continue
-            title = "⚠️ Spawn Incoming"
-            desc = f"**{key.replace('_', ' ')}** will spawn soon."
-            fields = {"ETA": f"<t:{unix_ts(spawn_time)}:R>"}
-            embed = build_embed(title, desc, fields, color=GOLD)
-            warn_msg = await channel.send(content="@everyone", embed=embed)
-            spawn_warned.add((cid, key))
-            asyncio.create_task(delete_later(warn_msg, 300))
-
-@tasks.loop(seconds=60)
-async def cleanup_expired_messages():
-    now = datetime.now(PHT)
-    expired_by_channel = {}
-    to_remove = []
+        channel = bot.get_channel(cid)
+        if channel is not None and channel.guild is not None:
+            owned = cid in ALLOWED_CHANNELS
+            register_channel(cid, channel.guild.id)
+            store.put_channel(cid, channel.guild.id)
+            if not owned and cid in ALLOWED_CHANNELS:
+                adopted.add(cid)
+        else:
+            register_channel(cid, None)
+    return adopted
+
+async def adopt_channels(channel_ids: set):
+    """Restore timers and boards for channels whose guild became visible after ready."""
+    redraw = restore_state(channel_ids=channel_ids)
+    for cid in channel_ids:
+        for timer in timers.channel(cid):
+            schedule_timer(timer)
+    for cid in redraw:
+        channel = bot.get_channel(cid)
+        if channel:
+            request_board_update(channel)
 
-    for (cid, key), spawn_time in list(global_next_spawn.items()):
-        # FIX: apply the correct duration offsets per category
-        duration = get_duration_hours(key)
-        expire = spawn_time + timedelta(minutes=10)  # grace period after spawn window opens
+@bot.event
+async def on_guild_available(guild: discord.Guild):
+    index_guild_roles(guild)
+    if leader and state_ready:
+        adopted = resolve_channel_guilds()
+        if adopted:
+            await adopt_channels(adopted)
 
-        if now >= expire:
-            expired_by_channel.setdefault(cid, []).append(
-                (key, spawn_origin_time.get((cid, key), spawn_time))
-            )
-            to_remove.append((cid, key))
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    index_guild_roles(guild)
 
-    for cid, entries in expired_by_channel.items():
-        channel = bot.get_channel(cid)
-        if not channel:
-            continue
-        lines = []
-        for key, origin in entries:
-            spawned_str = origin.strftime("%I:%M %p") if origin else "Unknown"
-            if key in BOSS_NAMES or key.startswith("PCARD") or key.startswith("BCARD"):
-                last_spawn_record[(cid, key)] = origin
-            lines.append(f"- {key.replace('_', ' ')} (taken at {spawned_str})")
-        embed = build_embed(
-            "❌ Expired Spawns",
-            "The following spawns have now opened (no update received):",
-            {"Expired": "\n".join(lines)},
-            color=0xE74C3C
-        )
-        exp_msg = await channel.send(embed=embed)
-        asyncio.create_task(delete_later(exp_msg, 300))
-
-    for item in to_remove:
-        cid, key = item
-        global_next_spawn.pop((cid, key), None)
-        spawn_warned.discard((cid, key))
-        card_auto_extended.discard((cid, key))
-        spawn_origin_time.pop((cid, key), None)
-        ch = bot.get_channel(cid)
-        if ch:
-            await update_upcoming_message(ch)
-
-@tasks.loop(minutes=1)
-async def extend_card_time():
-    now = datetime.now(PHT)
-    for (cid, key), spawn_time in list(global_next_spawn.items()):
-        if not key.startswith("BCARD"):
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    index_guild_roles(role.guild)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    index_guild_roles(role.guild)
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name or before.position != after.position:
+        index_guild_roles(after.guild)
+
+def schedule_timer(timer: SpawnTimer):
+    """(Re)arm the warn / auto-extend / expire deadlines for one timer."""
+    spawn_time = timer.next_spawn
+    rule = spawn_rule(timer.key)
+    deadlines = []
+    if not timer.warned:
+        deadlines.append((spawn_time - rule.warn, WARN))
+    if rule.extend and not timer.extended:
+        deadlines.append((spawn_time, EXTEND))
+    deadlines.append((spawn_time + rule.grace, EXPIRE))
+    scheduler.schedule(timer.channel_key, deadlines)
+
+async def handle_spawn_events(due):
+    metrics.SCHEDULER_LAG_SECONDS.observe(scheduler.lag, scheduler="timers")
+    now = clock.now(PHT)
+    expired_by_channel = {}
+    for kind, (cid, key) in due:
+        if kind == COMPACT:
+            compact_store()
             continue
-        if (cid, key) in card_auto_extended:
+        timer = timers.get(cid, key)
+        if timer is None:
             continue
-        # FIX: wider 5-minute window so task jitter doesn't cause misses
-        if now >= spawn_time and (now - spawn_time).total_seconds() < 300:
-            global_next_spawn[(cid, key)] = spawn_time + timedelta(minutes=30)
-            card_auto_extended.add((cid, key))
-            ch = bot.get_channel(cid)
-            if ch:
-                await update_upcoming_message(ch)
-
-async def delete_later(msg: discord.Message, delay_seconds: int):
-    await asyncio.sleep(delay_seconds)
+        # Deadline work has no message; its events (and the REST calls it queues) share kind:channel:key
+        with events.correlate(f"{kind}:{cid}:{key}"):
+            if kind == WARN:
+                five_minute_warning(timer, now)
+            elif kind == EXTEND:
+                extend_card_time(timer, now)
+            elif kind == EXPIRE:
+                expired_by_channel.setdefault(cid, []).append(timer)
+    for cid, expired in expired_by_channel.items():
+        with events.correlate(f"{EXPIRE}:{cid}"):
+            cleanup_expired_messages(cid, expired)
+
+def five_minute_warning(timer: SpawnTimer, now: datetime):
+    if timer.warned:
+        return
+    secs = (timer.next_spawn - now).total_seconds()
+    if secs < 0:
+        return
+    channel = bot.get_channel(timer.channel_id)
+    if not channel:
+        return
+    timer.warned = True
+    persist_timer(timer)
+    add_warning(channel, timer)
+    events.emit("timer.warned", channel=timer.channel_id, key=timer.key, lead_s=round(secs))
+
+# ---------------- SPAWN WARNINGS ----------------
+WARN_GATHER_SECONDS = 10     # warnings inside this window share one @everyone message
+WARN_BATCH_SECONDS = 240     # later warnings edit the sent message until it is this old
+
+class WarnBatch:
+    __slots__ = ("spawns", "message_id", "sent_at", "rendered", "flush")
+
+    def __init__(self):
+        self.spawns = {}            # spawn_key -> next spawn (PHT)
+        self.message_id = None
+        self.sent_at = None
+        self.rendered = 0           # spawns included in the last send/edit
+        self.flush = None           # pending flush_warnings call, until the send goes out
+
+warn_batches = {}   # channel_id -> open WarnBatch
+
+def add_warning(channel: discord.TextChannel, timer: SpawnTimer):
+    batch = warn_batches.get(channel.id)
+    if batch is None or (batch.sent_at is not None and clock.monotonic() - batch.sent_at > WARN_BATCH_SECONDS):
+        batch = warn_batches[channel.id] = WarnBatch()
+    batch.spawns[timer.key] = timer.next_spawn
+    if batch.message_id is not None:
+        # Already pinged: update the same embed in place, without a new @everyone
+        outbox.submit(channel.id, WARNING, lambda: edit_warning(channel, batch),
+                      key=("warn", channel.id), route=EDIT)
+    elif batch.flush is None:
+        batch.flush = asyncio.get_running_loop().call_later(WARN_GATHER_SECONDS, flush_warnings, channel, batch)
+
+def abandon_warnings(channel_id: int, batch: WarnBatch):
+    """Close a batch whose @everyone never went out, so later warnings start a new one."""
+    if warn_batches.get(channel_id) is batch:
+        del warn_batches[channel_id]
+
+def build_warning_embed(batch: WarnBatch):
+    spawns = sorted(batch.spawns.items(), key=lambda item: item[1])
+    batch.rendered = len(spawns)
+    lines = [f"**{key.replace('_', ' ')}** — <t:{unix_ts(when)}:R>" for key, when in spawns]
+    title = "⚠️ Spawn Incoming" if len(lines) == 1 else f"⚠️ {len(lines)} Spawns Incoming"
+    return build_embed(title, "The following will spawn soon.", {"ETA": "\n".join(lines)}, color=GOLD)
+
+def flush_warnings(channel: discord.TextChannel, batch: WarnBatch):
+    outbox.submit(channel.id, WARNING, lambda: send_warning(channel, batch),
+                  on_drop=lambda: abandon_warnings(channel.id, batch))
+
+async def send_warning(channel: discord.TextChannel, batch: WarnBatch):
     try:
-        await msg.delete()
-    except (discord.NotFound, discord.Forbidden):
+        msg = await channel.send(content="@everyone", embed=build_warning_embed(batch))
+    except Exception:
+        abandon_warnings(channel.id, batch)
+        raise
+    events.emit("warning.sent", channel=channel.id, message=msg.id, spawns=sorted(batch.spawns))
+    batch.message_id = msg.id
+    batch.sent_at = clock.monotonic()
+    # Up for about the warning lead, until the spawns it announces open
+    lead = max(spawn_rule(key).warn for key in batch.spawns)
+    queue_deletion(msg, int(lead.total_seconds()))
+    if len(batch.spawns) != batch.rendered:
+        outbox.submit(channel.id, WARNING, lambda: edit_warning(channel, batch),
+                      key=("warn", channel.id), route=EDIT)
+
+async def edit_warning(channel: discord.TextChannel, batch: WarnBatch):
+    try:
+        await channel.get_partial_message(batch.message_id).edit(embed=build_warning_embed(batch))
+    except discord.NotFound:
         pass
-    # FIX: no bare except — let unexpected errors surface
+
+def cleanup_expired_messages(cid: int, expired: list):
+    channel = bot.get_channel(cid)
+    lines = []
+    for timer in expired:
+        key = timer.key
+        origin = timer.origin or timer.next_spawn
+        spawned_str = origin.strftime("%I:%M %p") if origin else "Unknown"
+        if spawn_rule(key).kind != "room":
+            last_spawns.set((cid, key), origin, origin.timestamp() + LAST_SPAWN_TTL)
+            store.put_last_spawn(cid, key, origin.timestamp())
+        lines.append(f"- {key.replace('_', ' ')} (taken at {spawned_str})")
+        history.record(HISTORY_EXPIRE, cid, key, timer.next_spawn.timestamp())
+        events.emit("timer.expired", channel=cid, key=key, next_spawn=timer.next_spawn.isoformat())
+
+        drop_timer(timer)
+
+    if not channel:
+        return
+    embed = build_embed(
+        "❌ Expired Spawns",
+        "The following spawns have now opened (no update received):",
+        {"Expired": "\n".join(lines)},
+        color=0xE74C3C
+    )
+    post_notice(channel, CONFIRM, 300, embed=embed)
+    request_board_update(channel)
+
+def extend_card_time(timer: SpawnTimer, now: datetime):
+    rule = spawn_rule(timer.key)
+    if timer.extended or not rule.extend:
+        return
+    # Only extend while the spawn is still up, i.e. before its grace runs out
+    if now - timer.next_spawn >= rule.grace:
+        return
+    timers.move(timer, timer.next_spawn + rule.extend)
+    timer.extended = True
+    persist_timer(timer)
+    schedule_timer(timer)
+    events.emit("timer.extended", channel=timer.channel_id, key=timer.key, next_spawn=timer.next_spawn.isoformat())
+    ch = bot.get_channel(timer.channel_id)
+    if ch:
+        request_board_update(ch)
+
+scheduler = DeadlineScheduler(handle_spawn_events)
+
+# ---------------- DELETION QUEUE ----------------
+DELETE_GRANULARITY = 60     # seconds; notices of a minute or more due in the same minute share one bulk call
+EARLY_DELETE_FRACTION = 0.1 # a notice may ride along with an earlier bulk call by this share of its delay
+BULK_DELETE_LIMIT = 100
+pending_deletions = {}      # channel_id -> {message_id: earliest time it may be deleted}
+
+def queue_deletion(msg: discord.Message, delay_seconds: int):
+    """Schedule a bot notice for deletion; due messages are removed per channel in bulk."""
+    due = clock.time() + delay_seconds
+    if delay_seconds >= DELETE_GRANULARITY:
+        due = math.ceil(due / DELETE_GRANULARITY) * DELETE_GRANULARITY
+    schedule_deletion(msg.channel.id, msg.id, due, due - delay_seconds * EARLY_DELETE_FRACTION)
+    store.put_deletion(msg.channel.id, msg.id, due)
+
+def schedule_deletion(channel_id: int, message_id: int, due: float, earliest: float | None = None):
+    when = datetime.fromtimestamp(due, timezone.utc)
+    deletion_scheduler.schedule((channel_id, message_id), [(when, DELETE)])
+    pending_deletions.setdefault(channel_id, {})[message_id] = due if earliest is None else earliest
+
+async def flush_deletions(due):
+    metrics.SCHEDULER_LAG_SECONDS.observe(deletion_scheduler.lag, scheduler="deletions")
+    by_channel = {}
+    for _, (cid, mid) in due:
+        by_channel.setdefault(cid, set()).add(mid)
+    now = clock.time()
+    for cid, ids in by_channel.items():
+        # A bulk call is going out anyway: take the channel's nearly due notices with it
+        pending = pending_deletions.get(cid, {})
+        ids |= {mid for mid, earliest in pending.items() if earliest <= now}
+        for mid in ids:
+            pending.pop(mid, None)
+            deletion_scheduler.cancel((cid, mid))
+        if not pending:
+            pending_deletions.pop(cid, None)
+        ids = sorted(ids)
+        channel = bot.get_channel(cid)
+        if not channel:
+            store.delete_deletions(cid, ids)
+            continue
+        for i in range(0, len(ids), BULK_DELETE_LIMIT):
+            chunk = ids[i:i + BULK_DELETE_LIMIT]
+            outbox.submit(cid, DELETE_JOB, lambda ch=channel, chunk=chunk: purge_notices(ch, chunk),
+                          on_drop=lambda cid=cid, chunk=chunk: retry_deletion(cid, chunk))
+
+def retry_deletion(channel_id: int, message_ids):
+    """A full outbox sheds deletions first; put them on next minute's bulk call instead."""
+    if not leader:
+        return      # stepped down; notice rows stay in the store for the next leader
+    due = clock.time() + DELETE_GRANULARITY
+    for mid in message_ids:
+        schedule_deletion(channel_id, mid, due)
+
+async def purge_notices(channel: discord.TextChannel, message_ids: list):
+    await bulk_delete(channel, message_ids)
+    store.delete_deletions(channel.id, message_ids)
+
+async def bulk_delete(channel: discord.TextChannel, message_ids: list):
+    if len(message_ids) > 1:
+        try:
+            await channel.delete_messages([discord.Object(id=mid) for mid in message_ids])
+            return
+        except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+            pass  # fall back to single deletes (own messages need no permission)
+    for mid in message_ids:
+        try:
+            await channel.get_partial_message(mid).delete()
+        except (discord.NotFound, discord.Forbidden):
+            pass
+
+deletion_scheduler = DeadlineScheduler(flush_deletions)
 
 
 # ---------------- COMMANDS ----------------
@@ -407,13 +1089,207 @@ async def clear_error(ctx, error):
     if isinstance(error, commands.MissingPermissions):
         await ctx.send("❌ You need Manage Messages permission to use this command.", delete_after=6)
 
+@bot.command(name="boardstats")
+async def boardstats_cmd(ctx):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    fields = {
+        "Refresh Requests": str(board_stats["requested"]),
+        "Coalesced": str(board_stats["coalesced"]),
+        "Sections Skipped (unchanged)": str(board_stats["unchanged"]),
+        "Section Edits / New Messages": f"{board_stats['edits']} / {board_stats['sends']}",
+        "REST Calls Saved": str(rest_calls_saved()),
+    }
+    await ctx.send(embed=build_embed("📊 Board Update Stats", "Since last restart.", fields), delete_after=30)
+
+@bot.command(name="memstats")
+async def memstats_cmd(ctx):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    fields = {}
+    for name, s in state_sizes().items():
+        line = f"{s['entries']:,} entries"
+        if "bytes" in s:
+            line += f", ~{s['bytes'] / 1024:,.0f} KiB ({s['expired']:,} expired, {s['evicted']:,} evicted)"
+        fields[name] = line
+    rss = resident_bytes()
+    fields["Resident Memory"] = f"{rss / 2**20:,.1f} MiB" if rss is not None else "n/a"
+    fields["Gateway"] = "lean (no member cache)" if LEAN_GATEWAY else "full member cache"
+    if startup_seconds is not None:
+        fields["Startup"] = f"{startup_seconds:.1f}s to ready"
+    await ctx.send(embed=build_embed("🧠 Memory Stats", "Since last restart.", fields), delete_after=30)
+
+@bot.command(name="filterstats")
+async def filterstats_cmd(ctx):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    accepted, rejected = prefilter_stats["accepted"], prefilter_stats["rejected"]
+    total = accepted + rejected
+    fields = {
+        "Accepted / Rejected": f"{accepted} / {rejected}",
+        "Reject Ratio": f"{rejected / total:.1%}" if total else "n/a",
+        "Time Saved": f"{prefilter_time_saved() * 1000:.2f} ms",
+    }
+    await ctx.send(embed=build_embed("🔎 Message Pre-filter Stats", "Since last restart.", fields), delete_after=30)
+
+@bot.command(name="tz")
+async def tz_cmd(ctx, zone: str = None):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    member_id = ctx.author.id
+    if zone is None:
+        current = get_member_timezone(ctx.author)
+        source = "override" if member_id in tz_overrides else "role"
+        await ctx.send(f"🌍 Your timezone is **{current.key}** ({source}).", delete_after=10)
+        return
+    if zone.lower() in ("reset", "clear", "off"):
+        tz_overrides.pop(member_id, None)
+        store.delete_tz_override(member_id)
+        await ctx.send("🌍 Timezone override removed; using your role again.", delete_after=10)
+        return
+    name = ROLE_TIMEZONES.get(zone.upper(), zone)
+    try:
+        get_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        await ctx.send(f"❌ Unknown timezone `{zone}`. Use a role code (PH, US, ...) or a name like `Europe/Berlin`.", delete_after=10)
+        return
+    tz_overrides[member_id] = name
+    store.put_tz_override(member_id, name)
+    await ctx.send(f"🌍 Timezone set to **{name}**.", delete_after=10)
+
+@bot.command(name="reload")
+@commands.guild_only()
+@commands.has_permissions(manage_guild=True)
+async def reload_cmd(ctx):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    try:
+        catalog = await asyncio.to_thread(load_catalog, CATALOG_PATH)
+    except CatalogError as e:
+        events.emit("catalog.rejected", logging.WARNING, error=str(e), user=ctx.author.id)
+        await ctx.send(f"❌ Catalog not reloaded, keeping the current one: {e}", delete_after=30)
+        return
+    apply_catalog(catalog)
+    events.emit("catalog.reloaded", source=catalog.source, types=len(catalog.rules), user=ctx.author.id)
+    fields = {
+        "Types": f"{len(catalog.rules)} ({len(catalog.names('card'))} cards, {len(catalog.names('boss'))} bosses, {len(catalog.names('room'))} rooms)",
+        "Locations": str(len(catalog.locations)),
+        "Live Timers Re-armed": str(len(timers)),
+    }
+    await ctx.send(embed=build_embed("🔄 Spawn Catalog Reloaded", f"Loaded `{os.path.basename(catalog.source)}`.", fields), delete_after=30)
+
+@reload_cmd.error
+async def reload_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need Manage Server permission to use this command.", delete_after=6)
+
+@bot.command(name="track")
+@commands.guild_only()
+@commands.has_permissions(manage_guild=True)
+async def track_cmd(ctx, action: str = "list", channel: discord.TextChannel = None):
+    channel = channel or ctx.channel
+    action = action.lower()
+    if action == "add":
+        register_channel(channel.id, channel.guild.id)
+        store.put_channel(channel.id, channel.guild.id)
+        await ctx.send(f"✅ Now tracking timers in {channel.mention}.", delete_after=10)
+    elif action == "remove":
+        tracked_channels.pop(channel.id, None)
+        ALLOWED_CHANNELS.discard(channel.id)
+        store.delete_channel(channel.id)
+        for timer in timers.channel(channel.id):
+            drop_timer(timer)
+        timers.drop_channel(channel.id)
+        board_hash.pop(channel.id, None)
+        board_queued.pop(channel.id, None)
+        store.delete_board(channel.id)
+        await ctx.send(f"🗑️ Stopped tracking timers in {channel.mention}.", delete_after=10)
+    else:
+        here = [f"<#{cid}>" for cid, gid in tracked_channels.items() if gid == ctx.guild.id]
+        await ctx.send(
+            embed=build_embed("📌 Tracked Channels", "\n".join(here) or "None in this server.", {}),
+            delete_after=30
+        )
+
+@track_cmd.error
+async def track_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need Manage Server permission to use this command.", delete_after=6)
+
+STATS_PERIOD = {"h": 3600, "d": 86400, "w": 7 * 86400}
+SPARK = "▁▂▃▄▅▆▇█"
+
+def sparkline(values: list) -> str:
+    top = max(values) or 1
+    return "".join(SPARK[v * (len(SPARK) - 1) // top] if v else "·" for v in values)
+
+@bot.command(name="stats")
+async def stats_cmd(ctx, *args):
+    if ctx.channel.id not in ALLOWED_CHANNELS:
+        return
+    words = list(args)
+    period = "7d"
+    if words and words[-1][:-1].isdigit() and words[-1][-1:].lower() in STATS_PERIOD:
+        period = words.pop().lower()
+    parsed = parse_message(" ".join(words))
+    if not parsed.type_key:
+        await ctx.send("Usage: `!stats <spawn> [period]`, e.g. `!stats BN 7d` or `!stats pcard nuc 30d`.", delete_after=10)
+        return
+    key = parsed.spawn_key
+    now = clock.time()
+    since = now - int(period[:-1]) * STATS_PERIOD[period[-1]]
+    offset = clock.now(PHT).utcoffset().total_seconds()
+    stats = await asyncio.to_thread(history.stats, ctx.channel.id, key, since, offset)
+
+    fields = {
+        "Reports / Missed": f"{stats['takes']} / {stats['missed']} (expired with no update)",
+        "Reports by Hour (PHT, 00→23)": f"`{sparkline(stats['per_hour'])}`",
+    }
+    if stats["reporters"]:
+        fields["Top Reporters"] = "\n".join(f"<@{uid}> × {n}" for uid, n in stats["reporters"])
+    live = timers.get(ctx.channel.id, key)
+    if live is not None:
+        fields["Next Spawn"] = f"<t:{unix_ts(live.next_spawn)}:t> (tracked)"
+    else:
+        last = stats["last_take"] or await asyncio.to_thread(history.last_take, ctx.channel.id, key, now - 90 * 86400)
+        if last is not None:
+            predicted = predict_next(last, spawn_rule(key).duration.total_seconds(), now)
+            fields["Predicted Window"] = f"<t:{int(predicted - 600)}:t> – <t:{int(predicted + 600)}:t> (unreported)"
+    await ctx.send(embed=build_embed(f"📈 {key.replace('_', ' ')} — last {period}", f"Channel history since <t:{int(since)}:R>.", fields), delete_after=60)
+
+def format_hours(span: timedelta) -> str:
+    hours = span.total_seconds() / 3600
+    return f"{hours:g} hour" + ("" if hours == 1 else "s")
+
+def describe_durations(catalog: Catalog) -> str:
+    """One help line per kind: its usual respawn time, then the types that differ."""
+    lines = []
+    for kind, label in (("card", "Cards"), ("room", "Rooms"), ("boss", "Bosses")):
+        rules = [rule for rule in catalog.rules.values() if rule.kind == kind]
+        if not rules:
+            continue
+        durations = [rule.duration for rule in rules]
+        usual = max(durations, key=durations.count)
+        line = f"• **{label}** — **{format_hours(usual)}**"
+        others = [f"**{rule.name} ({rule.key})** — **{format_hours(rule.duration)}**"
+                  for rule in rules if rule.duration != usual]
+        if others:
+            line += ", except " + ", ".join(others)
+        extends = [f"{rule.key} auto-extends +{rule.extend.total_seconds() / 60:g}m if not updated"
+                   for rule in rules if rule.extend]
+        if extends:
+            line += f" ({'; '.join(extends)})"
+        lines.append(line + ".")
+    return "\n".join(lines)
+
 @bot.command(name="help")
 async def help_cmd(ctx):
     if ctx.channel.id not in ALLOWED_CHANNELS:
         return
-    rooms_list = ", ".join([f"{k} ({v})" for k, v in ROOM_NAMES.items()])
-    cards_list = ", ".join([f"{k} ({v})" for k, v in CARD_NAMES.items()])
-    bosses_list = ", ".join([f"{k} ({v})" for k, v in BOSS_NAMES.items()])
+    catalog = active_catalog()
+    rooms_list = ", ".join([f"{k} ({v})" for k, v in catalog.names("room").items()])
+    cards_list = ", ".join([f"{k} ({v})" for k, v in catalog.names("card").items()])
+    bosses_list = ", ".join([f"{k} ({v})" for k, v in catalog.names("boss").items()])
 
     embed = discord.Embed(
         title="🧭 Command Help — Timer Tracker Bot",
@@ -438,23 +1314,24 @@ async def help_cmd(ctx):
             "`pcard rb 1:15am`\n"
             "`bcard crude 2:00pm`\n"
             "`eg 3:30pm`\n"
-            "`bn 4:00pm`"
+            "`bn 4:00pm`\n"
+            "Times can also be 24-hour (`bn 16:00`), an offset (`eg 20m ago`, `tank -15`) "
+            "or just the minute (`avg :45`, the last time the clock showed it).\n"
+            "Paste several timers at once, one per line or separated by commas."
         ),
         inline=False
     )
     embed.add_field(
         name="⏱️ Timers",
-        value=(
-            "• **PCARD (Purple Card)** — fixed **3 hours**.\n"
-            "• **BCARD (Blue Card)** — **2.5 hours** (auto-extends +30m if not updated).\n"
-            "• **Rooms** — **2 hours**.\n"
-            "• **Bosses** — **6 hours**, except **Bloodnest (BN)** — **3 hours**."
-        ),
+        value=describe_durations(catalog),
         inline=False
     )
     embed.add_field(
         name="🌍 Timezone Support",
-        value="The bot reads your timezone role automatically (PH, IND, MY, RU, US, TH, AU). If no role, defaults to PH.",
+        value=(
+            "The bot reads your timezone role automatically (PH, IND, MY, RU, US, TH, AU). If no role, defaults to PH.\n"
+            "`!tz <zone>` overrides it (e.g. `!tz US`, `!tz Europe/Berlin`); `!tz reset` goes back to your role."
+        ),
         inline=False
     )
     embed.add_field(
@@ -462,195 +1339,282 @@ async def help_cmd(ctx):
         value="`!clear <amount>` — Deletes recent messages (default: 20). Requires Manage Messages permission.",
         inline=False
     )
+    embed.add_field(
+        name="📌 Channel Setup",
+        value="`!track add|remove [#channel]` — Start or stop tracking a channel; `!track` lists them. Requires Manage Server permission.",
+        inline=False
+    )
+    embed.add_field(
+        name="📈 Spawn Stats",
+        value="`!stats <spawn> [period]` — Reports per hour, top reporters, missed spawns and the predicted next window, e.g. `!stats BN 7d`.",
+        inline=False
+    )
+    embed.add_field(
+        name="📊 Board Stats",
+        value=(
+            "`!boardstats` — Shows how many board refreshes were merged or skipped.\n"
+            "`!memstats` — Shows the size of the bot's in-memory state.\n"
+            "`!reload` — Reloads spawn types and durations from the catalog file. Requires Manage Server permission."
+        ),
+        inline=False
+    )
     embed.set_footer(text="Timers auto-update and confirmation messages auto-delete.")
     await ctx.send(embed=embed)
 
 
+# ---------------- REPORTS ----------------
+ACCEPTED, PAST, POSTED, REPEAT = "accepted", "past", "posted", "repeat"
+
+class Report(NamedTuple):
+    status: str
+    spawn_key: str
+    next_spawn: datetime
+    taken: datetime
+    location: str | None
+
+def evaluate_report(parsed: ParseResult, user_tz: ZoneInfo, user_id: int, channel_id: int, now: datetime) -> Report:
+    """Work out a report's next spawn and whether it may be applied; mutates nothing.
+
+    `now` is the message's single clock reading (PHT); the typed time is read in user_tz.
+    """
+    spawn_key = parsed.spawn_key
+    now_user = now.astimezone(user_tz)
+    taken = resolve_taken(parsed.when, now_user) if parsed.when else now_user
+    taken_time_pht = taken.astimezone(PHT)
+
+    next_spawn = taken_time_pht + spawn_rule(spawn_key).duration
+    status = ACCEPTED
+    if next_spawn < now:
+        status = PAST
+    else:
+        # FIX: warn on any existing entry for this spawn_key, not just exact time match
+        existing = timers.get(channel_id, spawn_key)
+        if existing is not None and existing.next_spawn == next_spawn:
+            status = POSTED
+        # Different time — this is an update, so allow it through (overwrites old entry)
+        elif user_sent_times.get((user_id, spawn_key)) == next_spawn:
+            status = REPEAT
+    return Report(status, spawn_key, next_spawn, taken_time_pht, parsed.location)
+
+def log_report(report: Report, parsed: ParseResult, batch: bool = False):
+    events.emit("report.decided", status=report.status, key=report.spawn_key, time=parsed.time_str,
+                taken=report.taken.isoformat(), next_spawn=report.next_spawn.isoformat(), batch=batch)
+
+def apply_report(report: Report, user_id: int, channel_id: int):
+    user_sent_times.set((user_id, report.spawn_key), report.next_spawn, expires_at(report.spawn_key, report.next_spawn).timestamp())
+    store.put_user_sent(user_id, report.spawn_key, report.next_spawn.timestamp())
+    track_timer(channel_id, report.spawn_key, report.next_spawn, report.taken)
+    history.record(HISTORY_TAKE, channel_id, report.spawn_key, report.taken.timestamp(), user_id)
+
+def summary_lines(lines: list) -> str:
+    """Join lines for an embed field, staying under Discord's 1024-char limit."""
+    text = "\n".join(lines)
+    if len(text) <= 1024:
+        return text
+    kept = []
+    for line in lines:
+        if sum(len(k) + 1 for k in kept) + len(line) > 1000:
+            break
+        kept.append(line)
+    return "\n".join(kept) + f"\n… and {len(lines) - len(kept)} more"
+
+def handle_batch(message: discord.Message, batch: list, user_tz: ZoneInfo, now: datetime):
+    """Validate every line first, then apply the accepted ones together."""
+    channel_id, user_id = message.channel.id, message.author.id
+    accepted, duplicates, rejected = [], [], []
+    to_apply = []
+    seen = set()
+    for segment, parsed in batch:
+        label = segment if len(segment) <= 40 else segment[:39] + "…"
+        if not names_spawn(parsed):
+            rejected.append(f"`{label}` — no spawn type or location")
+            continue
+        report = evaluate_report(parsed, user_tz, user_id, channel_id, now)
+        log_report(report, parsed, batch=True)
+        name = report.spawn_key.replace("_", " ")
+        if report.spawn_key in seen:
+            duplicates.append(f"**{name}** — repeated in this message")
+        elif report.status == ACCEPTED:
+            to_apply.append(report)
+            accepted.append(f"**{name}** — spawns <t:{unix_ts(report.next_spawn)}:t>")
+        elif report.status == PAST:
+            rejected.append(f"**{name}** — `{label}` puts the spawn in the past")
+        else:
+            duplicates.append(f"**{name}** — already posted")
+        seen.add(report.spawn_key)
+
+    for report in to_apply:
+        apply_report(report, user_id, channel_id)
+
+    fields = {}
+    if accepted:
+        fields[f"✅ Accepted ({len(accepted)})"] = summary_lines(accepted)
+    if duplicates:
+        fields[f"♻️ Duplicate ({len(duplicates)})"] = summary_lines(duplicates)
+    if rejected:
+        fields[f"❌ Rejected ({len(rejected)})"] = summary_lines(rejected)
+    embed = build_embed("🗂️ Bulk Timer Update", f"{len(batch)} lines from {message.author.display_name}", fields)
+    post_notice(message.channel, CONFIRM, 300, embed=embed)
+    post_delete(message)
+    events.emit("report.batch", channel=channel_id, user=user_id, lines=len(batch),
+                accepted=len(accepted), duplicates=len(duplicates), rejected=len(rejected))
+    if to_apply:
+        request_board_update(message.channel)
+
+
 # ---------------- MESSAGE HANDLER ----------------
+prefilter_stats = {"accepted": 0, "rejected": 0, "accept_seconds": 0.0, "reject_seconds": 0.0}
+
+def prefilter_time_saved() -> float:
+    """Seconds saved by rejecting chat before timezone resolution and parsing."""
+    if not prefilter_stats["accepted"] or not prefilter_stats["rejected"]:
+        return 0.0
+    full_cost = prefilter_stats["accept_seconds"] / prefilter_stats["accepted"]
+    reject_cost = prefilter_stats["reject_seconds"] / prefilter_stats["rejected"]
+    return prefilter_stats["rejected"] * max(full_cost - reject_cost, 0.0)
+
 @bot.event
 async def on_message(message: discord.Message):
-    if message.author.bot or message.channel.id not in ALLOWED_CHANNELS:
+    # Everything this message causes, including the REST jobs it queues, logs under its id
+    with events.correlate(message.id), metrics.ON_MESSAGE_SECONDS.time():
+        await handle_message(message)
+
+async def dispatch_commands(message: discord.Message):
+    # Skip building a command Context for the (vast majority of) non-command messages
+    if message.content.startswith(bot.command_prefix):
+        await bot.process_commands(message)
+
+async def handle_message(message: discord.Message):
+    if message.author.bot or not leader:
+        return
+    if message.channel.id not in ALLOWED_CHANNELS:
+        # Only admin commands (e.g. !track add) run outside tracked channels
+        await dispatch_commands(message)
         return
 
-    channel_id = message.channel.id
-    user_tz = get_member_timezone(message.author)
-    user_id = message.author.id
+    started = time.perf_counter()
+    if not is_candidate(message.content, bot.command_prefix):
+        elapsed = time.perf_counter() - started
+        prefilter_stats["rejected"] += 1
+        prefilter_stats["reject_seconds"] += elapsed
+        metrics.PARSE_SECONDS.observe(elapsed)
+        metrics.MESSAGES.inc(outcome="rejected")
+        events.emit("parse.rejected", channel=message.channel.id, chars=len(message.content))
+        await dispatch_commands(message)
+        return
+    prefilter_stats["accepted"] += 1
 
-    time_str, type_key, loc_key = find_time_keyword_location(message.content)
+    parsed = parse_message(message.content)
+    metrics.PARSE_SECONDS.observe(time.perf_counter() - started)
 
-    if not time_str and not type_key and not loc_key:
-        await bot.process_commands(message)
+    if not parsed.is_report:
+        metrics.MESSAGES.inc(outcome="not_report")
+        events.emit("parse.not_report", channel=message.channel.id, chars=len(message.content))
+        await dispatch_commands(message)
         return
+    metrics.MESSAGES.inc(outcome="report")
 
-    category = None
-    key = None
-    card_type = None          # FIX: initialise explicitly instead of using locals()
-    location_for_display = None
+    channel_id = message.channel.id
+    user_tz = get_member_timezone(message.author)
+    user_id = message.author.id
+    prefilter_stats["accept_seconds"] += time.perf_counter() - started
+    events.emit("parse.report", channel=channel_id, user=user_id, key=parsed.spawn_key, time=parsed.time_str,
+                when=parsed.when, tz=user_tz.key)
+
+    now = clock.now(PHT)
+    batch = split_reports(message.content)
+    if batch is not None:
+        handle_batch(message, batch, user_tz, now)
+        await dispatch_commands(message)
+        return
 
-    if type_key and type_key in CARD_KEYS:
-        category = "card"
-        card_type = type_key
-    elif type_key and type_key in BOSS_KEYS:
-        category = "boss"
-        if type_key in BOSS_NAMES:
-            key = type_key
-        else:
-            rev = {v.upper(): k for k, v in BOSS_NAMES.items()}
-            key = rev.get(type_key, type_key)
-    elif type_key and type_key in ROOM_KEYS:
-        category = "room"
-        if type_key in ROOM_NAMES:
-            key = type_key
-        else:
-            rev = {v.upper(): k for k, v in ROOM_NAMES.items()}
-            key = rev.get(type_key, type_key)
-
-    if not category and loc_key:
-        loc_norm = loc_key.upper()
-        for short, name in ROOM_NAMES.items():
-            if loc_norm == short or loc_norm == name.upper():
-                category = "room"
-                key = short
-                break
-
-    if not category:
-        for t in re.findall(r"[A-Za-z]+", message.content):
-            T = t.upper()
-            if T in BOSS_NAMES:
-                category = "boss"
-                key = T
-                break
-            if T in ROOM_NAMES:
-                category = "room"
-                key = T
-                break
-            if T in CARD_NAMES:
-                category = "card"
-                card_type = T
-                break
-            if T == "BLOOD":
-                category = "boss"
-                key = "BN"
-                break
-
-    if loc_key:
-        L = loc_key.upper()
-        mapped = LOCATION_ALIASES.get(L, L)
-        if mapped in CARD_LOCATIONS:
-            location_for_display = CARD_LOCATIONS[mapped]
-        elif mapped in ROOM_NAMES:
-            location_for_display = ROOM_NAMES[mapped]
-        else:
-            location_for_display = mapped
-
-    if category == "card" and not location_for_display:
-        for tok in re.findall(r"[A-Za-z]+", message.content):
-            T = tok.upper()
-            mapped = LOCATION_ALIASES.get(T, T)
-            if mapped in CARD_LOCATIONS:
-                location_for_display = CARD_LOCATIONS[mapped]
-                break
-
-    # Determine taken time in PHT
-    taken_time_pht = None
-    if time_str:
-        taken_time_pht = parse_time_string_to_pht(time_str, user_tz)
-    if not taken_time_pht:
-        taken_time_pht = datetime.now(user_tz).astimezone(PHT)
-
-    # Build spawn_key
-    if category == "boss":
-        spawn_key = key if key else "UNKNOWN_BOSS"
-    elif category == "room":
-        spawn_key = key if key else "UNKNOWN_ROOM"
-    else:
-        # FIX: use the explicitly initialised card_type variable
-        card_short = card_type if card_type else "PCARD"
-        loc_label = None
-        if location_for_display:
-            rev_card_locs = {v.upper(): k for k, v in CARD_LOCATIONS.items()}
-            loc_label = rev_card_locs.get(location_for_display.upper())
-        if loc_key:
-            loc_label = LOCATION_ALIASES.get(loc_key.upper(), loc_label)
-        loc_label = (loc_label or "UNKNOWN").replace(" ", "")
-        spawn_key = f"{card_short}_{loc_label}"
-
-    duration_hours = get_duration_hours(spawn_key)
-
-    now_pht = datetime.now(PHT)
-    next_spawn = taken_time_pht + timedelta(hours=duration_hours)
+    report = evaluate_report(parsed, user_tz, user_id, channel_id, now)
+    log_report(report, parsed)
+    spawn_key, next_spawn = report.spawn_key, report.next_spawn
 
     # FIX: if next_spawn is in the past, it means the report time was stale.
     # Rather than blindly adding a day, warn the user so they can re-enter.
-    if next_spawn < now_pht:
-        try:
-            await message.delete()
-        except (discord.NotFound, discord.Forbidden):
-            pass
-        await message.channel.send(
-            f"⚠️ The time you entered puts the next **{spawn_key.replace('_', ' ')}** spawn "
-            f"in the past ({next_spawn.strftime('%I:%M %p')} PHT). "
-            f"Please re-enter with the correct taken time.",
-            delete_after=10
+    if report.status == PAST:
+        post_delete(message)
+        post_notice(
+            message.channel, CONFIRM, 10,
+            content=(
+                f"⚠️ The time you entered puts the next **{spawn_key.replace('_', ' ')}** spawn "
+                f"in the past ({next_spawn.strftime('%I:%M %p')} PHT). "
+                f"Please re-enter with the correct taken time."
+            )
         )
         return
 
-    channel_key = (channel_id, spawn_key)
-
-    # FIX: warn on any existing entry for this spawn_key, not just exact time match
-    if channel_key in global_next_spawn:
-        existing = global_next_spawn[channel_key]
-        if existing == next_spawn:
-            try:
-                await message.delete()
-            except (discord.NotFound, discord.Forbidden):
-                pass
-            await message.channel.send(
+    if report.status == POSTED:
+        post_delete(message)
+        post_notice(
+            message.channel, CONFIRM, 6,
+            content=(
                 f"⚠️ The next spawn for **{spawn_key.replace('_', ' ')}** at "
-                f"{next_spawn.strftime('%I:%M %p')} PHT is already posted!",
-                delete_after=6
+                f"{next_spawn.strftime('%I:%M %p')} PHT is already posted!"
             )
-            return
-        # Different time — this is an update, so allow it through (overwrites old entry)
+        )
+        return
 
-    if spawn_key in user_sent_times.get(user_id, {}) and user_sent_times[user_id][spawn_key] == next_spawn:
-        try:
-            await message.delete()
-        except (discord.NotFound, discord.Forbidden):
-            pass
-        await message.channel.send(
-            f"⚠️ You already sent the same time for **{spawn_key.replace('_', ' ')}**.",
-            delete_after=5
+    if report.status == REPEAT:
+        post_delete(message)
+        post_notice(
+            message.channel, CONFIRM, 5,
+            content=f"⚠️ You already sent the same time for **{spawn_key.replace('_', ' ')}**."
         )
         return
 
-    user_sent_times.setdefault(user_id, {})[spawn_key] = next_spawn
-    global_next_spawn[channel_key] = next_spawn
-    spawn_origin_time[channel_key] = taken_time_pht
-    card_auto_extended.discard(channel_key)
-    spawn_warned.discard(channel_key)
-    last_spawn_record.pop((channel_id, spawn_key), None)
+    apply_report(report, user_id, channel_id)
 
     desc = f"{spawn_key.replace('_', ' ')}"
     fields = {
-        "Taken At": taken_time_pht.strftime("%I:%M %p") + " PHT",
+        "Taken At": report.taken.strftime("%I:%M %p") + " PHT",
         "Next Spawn": f"<t:{unix_ts(next_spawn)}:T> (<t:{unix_ts(next_spawn)}:R>)"
     }
-    if location_for_display:
-        fields["Location"] = location_for_display
+    if report.location:
+        fields["Location"] = report.location
 
     confirm_embed = build_embed("✅ Timer Set", desc, fields, color=GOLD)
-    confirm_msg = await message.channel.send(embed=confirm_embed)
-    asyncio.create_task(delete_later(confirm_msg, 300))
+    post_notice(message.channel, CONFIRM, 300, embed=confirm_embed)
 
-    try:
-        await message.delete()
-    except (discord.NotFound, discord.Forbidden):
-        pass
+    post_delete(message)
 
-    await update_upcoming_message(message.channel)
-    await bot.process_commands(message)
+    request_board_update(message.channel)
+    await dispatch_commands(message)
 
 
 # ---------------- RUN BOT ----------------
-bot.run(os.environ["TOKEN"])
+async def hand_over():
+    """Send what is queued, then let a standby take the lease without waiting out the TTL."""
+    await outbox.drain()
+    if lease is not None and leader:
+        # The store fences anything this instance still writes afterwards
+        step_down()
+        await asyncio.to_thread(lease.release)
+
+async def shutdown():
+    await hand_over()
+    await bot.close()
+
+async def main():
+    events.start()
+    server = await keep_alive(health, port=int(os.environ.get("PORT", 5000)))
+    loop = asyncio.get_running_loop()
+    # Cloud Run stops instances with SIGTERM; close the gateway so cleanup below runs.
+    loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(shutdown()))
+    try:
+        async with bot:
+            await bot.start(os.environ["TOKEN"])
+    finally:
+        scheduler.stop()
+        deletion_scheduler.stop()
+        await server.cleanup()
+        store.close()
+        history.close()
+        if lease is not None:
+            lease.close()
+        events.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
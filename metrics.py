@@ -0,0 +1,111 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+# ---------------- REGISTRY ----------------
+REGISTRY = []
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, v in list(self._values.items()):
+            yield f"{self.name}{_label_str(self.labels, key)} {v}"
+
+
+class Gauge:
+    """Gauge whose samples come from a callback at scrape time: fn() -> {label_tuple: value}."""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), fn=None):
+        self.name, self.help, self.labels, self.fn = name, help, labels, fn
+        REGISTRY.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        samples = self.fn() if self.fn else {}
+        for key, v in samples.items():
+            yield f"{self.name}{_label_str(self.labels, key)} {v}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series = {}       # label tuple -> [bucket counts..., sum, count]
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                yield f"{self.name}_bucket{_label_str(names, key + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {series[-1]}"
+            yield f"{self.name}_sum{_label_str(self.labels, key)} {series[-2]}"
+            yield f"{self.name}_count{_label_str(self.labels, key)} {series[-1]}"
+
+
+def render() -> str:
+    """Prometheus text exposition of every registered metric."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- BOT METRICS ----------------
+ON_MESSAGE_SECONDS = Histogram("bot_on_message_seconds", "on_message handler latency")
+PARSE_SECONDS = Histogram("bot_parse_seconds", "Pre-filter plus parse time per message")
+BOARD_RENDER_SECONDS = Histogram("bot_board_render_seconds", "Upcoming board render and diff time; edits run later in the outbox")
+SCHEDULER_LAG_SECONDS = Histogram("bot_scheduler_lag_seconds", "Delay between a timer deadline and its handling",
+                                  labels=("scheduler",))
+REST_SECONDS = Histogram("bot_rest_seconds", "Outbound Discord REST call latency", labels=("method",))
+REST_CALLS = Counter("bot_rest_calls_total", "Outbound Discord REST calls", labels=("method", "status"))
+RATE_LIMITS = Counter("bot_rate_limited_total", "429 responses reported by discord.py")
+MESSAGES = Counter("bot_messages_total", "Messages seen by on_message", labels=("outcome",))
+OUTBOX_WAIT_SECONDS = Histogram("bot_outbox_wait_seconds", "Time a REST job waited in the outbox", labels=("priority",))
+OUTBOX_DROPPED = Counter("bot_outbox_dropped_total", "REST jobs dropped unsent", labels=("priority", "reason"))
+EVENTS_DROPPED = Counter("bot_events_dropped_total", "Structured log events not written", labels=("event", "reason"))
@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+import clock
+import events
+import metrics
+
+# Priority classes; lower runs first within a channel.
+WARNING = 0
+BOARD = 1
+CONFIRM = 2
+DELETE = 3
+PRIORITY_NAMES = ("warning", "board", "confirm", "delete")
+
+# Discord rate-limits each route separately, so each gets its own bucket and
+# queue per channel. Jobs go on their priority's usual route unless told otherwise.
+SEND = "send"
+EDIT = "edit"
+REMOVE = "delete"
+DEFAULT_ROUTES = (SEND, EDIT, SEND, REMOVE)
+QUEUE_LIMIT = 25            # queued jobs per channel and route; warnings are never dropped
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = clock.monotonic()
+
+    def delay(self) -> float:
+        """Take a token if one is available, else return seconds until one is."""
+        now = clock.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Job:
+    __slots__ = ("priority", "factory", "key", "on_drop", "queued", "cid")
+
+    def __init__(self, priority, factory, key, on_drop):
+        self.priority = priority
+        self.factory = factory          # zero-arg callable returning an awaitable
+        self.key = key
+        self.on_drop = on_drop          # zero-arg callable run if the job is dropped unsent
+        self.queued = time.perf_counter()
+        self.cid = events.correlation_id.get()  # the worker runs the job under its submitter's id
+
+
+class Outbox:
+    """Per-channel prioritized REST queue with token-bucket pacing.
+
+    Handlers submit a factory and return immediately. Each channel and route
+    gets its own worker, started on demand, that runs jobs in priority order at
+    no more than `rate` calls per second (bursts up to `burst`). Jobs submitted
+    with a key replace any still-queued job with the same key, so repeated board
+    edits collapse into the latest one. A full queue drops its least important
+    job, and a halted outbox drops what is queued and everything submitted until
+    resume(); a standby instance stays halted.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, limit: int = QUEUE_LIMIT):
+        self.rate = rate
+        self.burst = burst
+        self.limit = limit
+        self._queues = {}           # (channel_id, route) -> heap of (priority, seq, job)
+        self._pending = {}          # coalesce key -> queued job
+        self._buckets = {}
+        self._workers = {}
+        self._counter = itertools.count()
+        self.collapsed = 0
+        self.dropped = 0
+        self.halted = False
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def depth(self) -> dict:
+        """Queued jobs per priority class."""
+        counts = dict.fromkeys(PRIORITY_NAMES, 0)
+        for q in self._queues.values():
+            for priority, _, _ in q:
+                counts[PRIORITY_NAMES[priority]] += 1
+        return counts
+
+    def submit(self, channel_id: int, priority: int, factory, key=None, route=None, on_drop=None):
+        job = _Job(priority, factory, key, on_drop)
+        if self.halted:
+            self._drop(job, "halted")
+            return
+        if key is not None:
+            queued = self._pending.get(key)
+            if queued is not None:
+                queued.factory = factory
+                queued.on_drop = on_drop
+                queued.cid = job.cid
+                self.collapsed += 1
+                return
+        slot = (channel_id, route or DEFAULT_ROUTES[priority])
+        queue = self._queues.setdefault(slot, [])
+        if len(queue) >= self.limit:
+            worst = max(queue)
+            if worst[0] == WARNING:
+                pass                        # only warnings queued: never shed an @everyone
+            elif priority >= worst[0]:
+                self._drop(job, "overflow")
+                return
+            else:
+                queue.remove(worst)
+                heapq.heapify(queue)
+                self._drop(worst[2], "overflow")
+        if key is not None:
+            self._pending[key] = job
+        heapq.heappush(queue, (priority, next(self._counter), job))
+        worker = self._workers.get(slot)
+        if worker is None or worker.done():
+            self._workers[slot] = asyncio.create_task(self._drain(slot))
+
+    def _drop(self, job: _Job, reason: str):
+        if job.key is not None and self._pending.get(job.key) is job:
+            del self._pending[job.key]
+        self.dropped += 1
+        metrics.OUTBOX_DROPPED.inc(priority=PRIORITY_NAMES[job.priority], reason=reason)
+        if job.on_drop is not None:
+            job.on_drop()
+
+    async def _drain(self, slot: tuple):
+        channel_id, _ = slot
+        queue = self._queues[slot]
+        bucket = self._buckets.get(slot)
+        if bucket is None:
+            bucket = self._buckets[slot] = TokenBucket(self.rate, self.burst)
+        while queue:
+            wait = bucket.delay()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            _, _, job = heapq.heappop(queue)
+            if job.key is not None:
+                self._pending.pop(job.key, None)
+            metrics.OUTBOX_WAIT_SECONDS.observe(
+                time.perf_counter() - job.queued, priority=PRIORITY_NAMES[job.priority]
+            )
+            with events.correlate(job.cid):
+                try:
+                    await job.factory()
+                except Exception:
+                    events.emit("outbox.job_failed", logging.ERROR, exc_info=True,
+                                channel=channel_id, priority=PRIORITY_NAMES[job.priority])
+        self._queues.pop(slot, None)
+
+    async def drain(self, timeout: float = 5.0):
+        """Wait (bounded) for queued jobs to go out, e.g. before shutdown."""
+        workers = [w for w in self._workers.values() if not w.done()]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def halt(self):
+        """Drop queued jobs, cancel the workers, and ignore submits until resume()."""
+        self.halted = True
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        queues, self._queues = self._queues, {}
+        for queue in queues.values():
+            for _, _, job in queue:
+                self._drop(job, "halted")
+        self._pending.clear()
+
+    def resume(self):
+        self.halted = False
@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+import clock
+import events
+
+# Event kinds fired by the scheduler
+WARN = "warn"
+EXTEND = "extend"
+EXPIRE = "expire"
+DELETE = "delete"
+COMPACT = "compact"
+
+
+class DeadlineScheduler:
+    """Single min-heap of timer events that sleeps exactly until the next deadline.
+
+    Each key owns a generation number. Rescheduling a key bumps it, so entries
+    from the previous schedule are skipped lazily when they reach the top of
+    the heap instead of being searched for and removed.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback        # async callback(list[(kind, key)])
+        self.lag = 0.0                  # seconds the last batch fired after its deadline
+        self._heap = []
+        self._gen = {}
+        self._counter = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self):
+        return len(self._gen)
+
+    def next_deadline(self) -> float | None:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, key, events):
+        """Replace every pending event of key with events: iterable of (datetime, kind)."""
+        gen = next(self._counter)
+        self._gen[key] = gen
+        for when, kind in events:
+            heapq.heappush(self._heap, (when.timestamp(), next(self._counter), gen, key, kind))
+        if len(self._heap) > 64 and len(self._heap) > 4 * len(self._gen):
+            self._compact()
+        self._wake.set()
+
+    def cancel(self, key):
+        self._gen.pop(key, None)
+
+    def clear(self):
+        """Forget every pending event."""
+        self._gen.clear()
+        self._heap.clear()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _drop_stale(self):
+        while self._heap and self._gen.get(self._heap[0][3]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [e for e in self._heap if self._gen.get(e[3]) == e[2]]
+        heapq.heapify(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = clock.time()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, gen, key, kind = heapq.heappop(self._heap)
+                if self._gen.get(key) != gen:
+                    continue
+                due.append((kind, key))
+                self.lag = now - deadline
+            if due:
+                try:
+                    await self.callback(due)
+                except Exception:
+                    events.emit("scheduler.callback_failed", logging.ERROR, exc_info=True, events=len(due))
+                continue
+
+            self._drop_stale()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,301 @@
+import re
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from spawns import Catalog, load_catalog
+
+# One lexer pass yields either a "1:30 PM" time or a word token. Most reports
+# use that form; for the rest, lines with a digit get a second pass for times.
+LEXER = re.compile(r"(\d{1,2}:\d{2}\s*(?:AM|PM))|([A-Za-z]+)", re.IGNORECASE)
+HAS_DIGIT = re.compile(r"[0-9]")
+
+# The other time forms; the group that matched last (m.lastindex) says which,
+# and also ranks them from most to least explicit.
+TIME_LEXER = re.compile(
+    r"(?=[0-9:\-])(?<![\w:\-])(?:"
+    r"(\d{1,2})(?::(\d{2}))?\s*([AP]M)(?![A-Z])"                             # 1-3: 8pm, 1:30pm
+    r"|(\d{1,2}):(\d{2})(?![\w:])"                                            # 4-5: 14:30
+    r"|(\d{1,3})\s*(MINUTES?|MINS?|M|HOURS?|HRS?|H)\s*AGO(?![A-Z])"             # 6-7: 20m ago, 1 hr ago
+    r"|-\s*(\d{1,3})(?![\w:])"                                                # 8: -15
+    r"|:?(\d{1,2})(?![\w:])"                                                   # 9: :45, 45 (see _scan_times)
+    r")",
+    re.IGNORECASE,
+)
+AMPM, CLOCK24, AGO, MINUS, MINUTE = 3, 5, 7, 8, 9
+NO_TIME = 10                # rank of a line without one
+# A bare minute must end the line and follow a spawn type or location word
+LAST_WORD = re.compile(r"([A-Z]+)\W*$", re.IGNORECASE)
+TRAILING_TOKEN = re.compile(r"[A-Z0-9]", re.IGNORECASE)
+
+# Resolved time forms: (CLOCK, hour, minute) is the latest such wall time no
+# more than 12h ahead, (DIAL, hour, minute) an unlabelled 1-12 o'clock time,
+# the latest h:MM or (h+12):MM not in the future, (OFFSET, minutes) is that
+# long before now, and (MINUTE_OF_HOUR, minute) is the latest :MM not in the future.
+CLOCK, DIAL, OFFSET, MINUTE_OF_HOUR = "clock", "dial", "offset", "minute"
+_HALF_DAY, _DAY, _HOUR = timedelta(hours=12), timedelta(days=1), timedelta(hours=1)
+
+# Type priority mirrors the original scan order: card > boss > weak alias > room.
+CARD, BOSS, WEAK, ROOM = 0, 1, 2, 3
+KIND_PRIORITY = {"card": CARD, "boss": BOSS, "room": ROOM}
+
+
+# ---------------- GRAMMAR (compiled from the catalog) ----------------
+class Grammar:
+    """Token tables for one catalog; parse_message reads them through one reference."""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        # token -> (priority, type key, kind); rooms first so cards and bosses win a clash
+        types = {}
+        rules = catalog.rules
+        for rule in sorted(rules.values(), key=lambda r: -KIND_PRIORITY[r.kind]):
+            hit = (KIND_PRIORITY[rule.kind], rule.key, rule.kind)
+            types[rule.key] = hit
+            types[rule.name.upper()] = hit
+        for word, key in catalog.weak_aliases.items():
+            types.setdefault(word, (WEAK, key, rules[key].kind))
+        for word, key in catalog.aliases.items():
+            types[word] = (KIND_PRIORITY[rules[key].kind], key, rules[key].kind)
+        self.types = types
+        # single tokens and "PREV CUR" pairs -> canonical location key
+        self.locations = catalog.location_aliases
+        # first words of two-word aliases; a pair is only looked up after one of these
+        self.pair_heads = frozenset(k.split(" ")[0] for k in self.locations if " " in k)
+        self.location_info = catalog.locations
+        self.rooms = frozenset(r.key for r in rules.values() if r.kind == "room")
+        self.default_card = catalog.default_card
+        # A line is only worth parsing if it carries a time in any form parse_message
+        # reads ("bs -15" names its spawn by location alone) or a spawn type keyword.
+        # Location words on their own ("bot", "down", "snow") are ordinary chat.
+        self.candidate = re.compile(
+            r"\d:\d\d|\d\s*[AP]M(?![A-Z])|\d\s*(?:MINUTES?|MINS?|M|HOURS?|HRS?|H)\s*AGO(?![A-Z])"
+            r"|-\s*\d|:\d|\d[^A-Z0-9]*$|(?<![A-Z])(?:"
+            + "|".join(sorted((re.escape(t) for t in types), key=len, reverse=True))
+            + r")(?![A-Z])",
+            re.IGNORECASE,
+        )
+
+
+_grammar = Grammar(load_catalog())
+
+
+def use_catalog(catalog: Catalog):
+    """Switch every later parse to catalog; compile first so the swap is one assignment."""
+    global _grammar
+    _grammar = Grammar(catalog)
+
+
+def active_catalog() -> Catalog:
+    return _grammar.catalog
+
+
+class ParseResult(NamedTuple):
+    time_str: str | None        # first time as typed, upper-cased ("1:30 PM", "20M AGO")
+    category: str | None        # "card" | "boss" | "room" | None
+    type_key: str | None        # canonical type (PCARD, BN, AP, ...)
+    loc_key: str | None         # canonical location key (BS BOT, NUC, ...)
+    location: str | None        # display name of the location
+    spawn_key: str | None       # timer key, e.g. "PCARD_NUC"
+    when: tuple | None = None   # resolved form of time_str, None if it is out of range
+
+    @property
+    def is_report(self) -> bool:
+        return bool(self.time_str or self.type_key or self.loc_key)
+
+
+NOT_A_REPORT = ParseResult(None, None, None, None, None, None)
+
+
+def read_time(m: re.Match) -> tuple | None:
+    """Time form of a lexer match, validated; None if a field is out of range."""
+    kind = m.lastindex
+    if kind == AMPM:
+        return _read_ampm(int(m[1]), int(m[2] or 0), m[3][0])
+    if kind == CLOCK24:
+        hour, minute = int(m[4]), int(m[5])
+        if hour >= 24 or minute > 59:
+            return None
+        # "1:30" with no AM/PM is as likely 13:30; 0:xx and 13:xx-23:xx are unambiguous
+        return (DIAL, hour % 12, minute) if 1 <= hour <= 12 else (CLOCK, hour, minute)
+    if kind == AGO:
+        return (OFFSET, int(m[6]) * (60 if m[7][0] in "hH" else 1))
+    if kind == MINUS:
+        return (OFFSET, int(m[8]))
+    minute = int(m[9])
+    return (MINUTE_OF_HOUR, minute) if minute < 60 else None
+
+
+def _read_ampm(hour: int, minute: int, half: str) -> tuple | None:
+    if not 1 <= hour <= 12 or minute > 59:
+        return None
+    return (CLOCK, hour % 12 + (12 if half in "pP" else 0), minute)
+
+
+def _read_clock_time(time_str: str) -> tuple | None:
+    """Time form of a LEXER "1:30 PM" token."""
+    colon = time_str.index(":")
+    return _read_ampm(int(time_str[:colon]), int(time_str[colon + 1:colon + 3]), time_str[-2])
+
+
+# Upper-cased time text -> time form. Reports repeat a small set of times, so
+# each is read once; the text alone decides the form. Bounded against odd spacing.
+_time_forms = {}
+TIME_FORM_CACHE_LIMIT = 4096
+
+
+def _remember(time_str: str, when: tuple | None) -> tuple | None:
+    if len(_time_forms) < TIME_FORM_CACHE_LIMIT:
+        _time_forms[time_str] = when
+    return when
+
+
+def _scan_times(content: str, type_table: dict, loc_table: dict) -> tuple:
+    """(time_str, when) of the most explicit time in the other forms.
+
+    A bare number ("bn 45") only reads as a minute when it ends the line
+    right after a spawn type or location; ":45" reads as one anywhere.
+    """
+    best = None
+    rank = NO_TIME
+    for m in TIME_LEXER.finditer(content):
+        kind = m.lastindex
+        if kind >= rank:
+            continue
+        if kind == MINUTE and m[0][0] != ":":
+            if TRAILING_TOKEN.search(content, m.end()) is not None:
+                continue
+            word = LAST_WORD.search(content, 0, m.start())
+            if word is None or (word[1].upper() not in type_table and word[1].upper() not in loc_table):
+                continue
+        best, rank = m, kind
+    if best is None:
+        return None, None
+    time_str = best[0].upper()
+    return time_str, _time_forms.get(time_str) or _remember(time_str, read_time(best))
+
+
+def resolve_taken(when: tuple, now: datetime) -> datetime:
+    """Absolute time for a parsed time form, in now's timezone."""
+    kind = when[0]
+    if kind == OFFSET:
+        return now - timedelta(minutes=when[1])
+    if kind == CLOCK:
+        taken = now.replace(hour=when[1], minute=when[2], second=0, microsecond=0)
+        if taken > now + _HALF_DAY:
+            taken -= _DAY
+        return taken
+    if kind == DIAL:
+        taken = now.replace(hour=when[1], minute=when[2], second=0, microsecond=0)
+        if taken + _HALF_DAY <= now:
+            taken += _HALF_DAY
+        elif taken > now:
+            taken -= _HALF_DAY
+        return taken
+    taken = now.replace(minute=when[1], second=0, microsecond=0)
+    if taken > now:
+        taken -= _HOUR
+    return taken
+
+
+def parse_message(content: str) -> ParseResult:
+    """Classify a chat line in one pass over its tokens, plus one over its
+    digits when it has no "1:30 PM" time."""
+    time_str = when = None
+    best = None                 # (priority, key) of the strongest type token so far
+    loc_key = None
+    prev = None
+
+    g = _grammar
+    type_table = g.types
+    loc_table = g.locations
+    pair_heads = g.pair_heads
+    for clock_time, word in LEXER.findall(content):
+        if clock_time:
+            if time_str is None:
+                time_str = clock_time.upper()
+            continue
+        tok = word.upper()
+        hit = type_table.get(tok)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+        if prev in pair_heads:
+            loc = loc_table.get(prev + " " + tok) or loc_table.get(tok)
+        else:
+            loc = loc_table.get(tok)
+        if loc is not None:
+            loc_key = loc
+        prev = tok
+
+    if time_str is not None:
+        when = _time_forms.get(time_str) or _remember(time_str, _read_clock_time(time_str))
+    elif (best is not None or loc_key is not None) and HAS_DIGIT.search(content) is not None:
+        # The other time forms only count next to a spawn type or location, so
+        # chat like "brb 5pm" or "see you at 9:30" stays chat
+        time_str, when = _scan_times(content, type_table, loc_table)
+
+    if time_str is None and best is None and loc_key is None:
+        return NOT_A_REPORT
+
+    category = type_key = None
+    if best is not None:
+        _, type_key, category = best
+    elif loc_key in g.rooms:
+        category = "room"
+        type_key = loc_key
+
+    location = suffix = None
+    if loc_key is not None:
+        location, suffix = g.location_info[loc_key]
+
+    if category == "boss" or category == "room":
+        spawn_key = type_key
+    else:
+        spawn_key = f"{type_key or g.default_card}_{suffix or 'UNKNOWN'}"
+
+    return ParseResult(time_str, category, type_key, loc_key, location, spawn_key, when)
+
+
+# ---------------- PRE-FILTER ----------------
+def is_candidate(content: str, prefix: str = "!") -> bool:
+    """Cheap check run before any timezone or parse work; commands never qualify."""
+    if content.startswith(prefix):
+        return False
+    return _grammar.candidate.search(content) is not None
+
+
+# ---------------- BULK INPUT ----------------
+LINE_SPLIT = re.compile(r"\n+")
+# A comma or semicolon only starts a new report when a spawn type follows it,
+# so "pcard nuc, 2:30pm" stays one report and "bn 1pm, eg 2pm" becomes two.
+CLAUSE_BREAK = re.compile(r"[,;]+\s*(?=([A-Z]+))", re.IGNORECASE)
+
+
+def _clauses(line: str, types: dict):
+    start = 0
+    for m in CLAUSE_BREAK.finditer(line):
+        if m[1].upper() in types:
+            yield line[start:m.start()]
+            start = m.end()
+    yield line[start:]
+
+
+def names_spawn(parsed: ParseResult) -> bool:
+    """True if a report says which timer it is, by type or by location."""
+    return parsed.type_key is not None or parsed.loc_key is not None
+
+
+def split_reports(content: str) -> list | None:
+    """Split a pasted multi-timer message into (segment, ParseResult) pairs.
+
+    Returns None unless at least two segments name a spawn type or location,
+    so a single report with a stray comma still parses as one.
+    """
+    types = _grammar.types
+    segments = [seg.strip() for line in LINE_SPLIT.split(content) for seg in _clauses(line, types)]
+    segments = [seg for seg in segments if seg]
+    if len(segments) < 2:
+        return None
+    parsed = [(seg, parse_message(seg)) for seg in segments]
+    if sum(1 for _, p in parsed if names_spawn(p)) < 2:
+        return None
+    return parsed
@@ -0,0 +1,137 @@
+import logging
+import os
+import tomllib
+from datetime import timedelta
+from typing import NamedTuple
+
+import events
+
+# ---------------- SPAWN CATALOG ----------------
+# Types, durations, names and aliases live in spawns.toml; load_catalog()
+# validates the file and compiles it into keyed tables for O(1) lookups.
+CATALOG_PATH = os.environ.get("SPAWN_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "spawns.toml"))
+KINDS = ("card", "boss", "room")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class SpawnRule(NamedTuple):
+    key: str
+    kind: str                       # "card" | "boss" | "room"
+    name: str
+    duration: timedelta             # respawn time after it is taken
+    grace: timedelta                # stays up this long after it spawns
+    warn: timedelta                 # warning lead time
+    extend: timedelta | None        # one-time auto-extend when the spawn opens
+
+
+class Catalog:
+    """Compiled spawn catalog. Its tables are never mutated; reloads build a new one."""
+
+    def __init__(self, rules: dict, locations: dict, aliases: dict, weak_aliases: dict, location_aliases: dict,
+                 default_card: str, fallback: SpawnRule, source: str = ""):
+        self.rules = rules                          # type key -> SpawnRule
+        self.locations = locations                  # location key -> (display name, key label)
+        self.aliases = aliases                      # extra word -> type key
+        self.weak_aliases = weak_aliases            # weak word -> type key
+        self.location_aliases = location_aliases    # word or "TWO WORDS" -> location key
+        self.default_card = default_card            # card type assumed when only a location is given
+        self.fallback = fallback
+        self.source = source
+        self.max_grace = max((r.grace for r in rules.values()), default=fallback.grace)
+        self._unknown = set()                       # unknown keys already reported
+
+    def rule(self, spawn_key: str) -> SpawnRule:
+        """Rule for a timer key: a type key, or a card key like "PCARD_NUC"."""
+        rule = self.rules.get(spawn_key)
+        if rule is None:
+            rule = self.rules.get(spawn_key.partition("_")[0])
+            if rule is None:
+                # Looked up on every board render and deadline; report each key once
+                if spawn_key not in self._unknown:
+                    self._unknown.add(spawn_key)
+                    events.emit("catalog.unknown_key", logging.WARNING, key=spawn_key,
+                                fallback_hours=self.fallback.duration.total_seconds() / 3600)
+                return self.fallback
+        return rule
+
+    def names(self, kind: str) -> dict:
+        """Type key -> display name for one kind, in catalog order."""
+        return {key: rule.name for key, rule in self.rules.items() if rule.kind == kind}
+
+
+def _minutes(table: dict, field: str, default, where: str) -> timedelta | None:
+    value = table.get(field, default)
+    if value is None:
+        return None
+    if not isinstance(value, (int, float)) or value < 0:
+        raise CatalogError(f"{where}: {field} must be a non-negative number")
+    return timedelta(minutes=value)
+
+
+def _words(table: dict, field: str, where: str) -> list:
+    words = table.get(field, [])
+    if not isinstance(words, list) or not all(isinstance(w, str) and w.strip() for w in words):
+        raise CatalogError(f"{where}: {field} must be a list of words")
+    return [w.strip().upper() for w in words]
+
+
+def compile_catalog(data: dict, source: str = "") -> Catalog:
+    """Validate parsed catalog data and build its lookup tables."""
+    defaults = data.get("defaults", {})
+    grace = _minutes(defaults, "grace_minutes", 10, "defaults")
+    warn = _minutes(defaults, "warn_minutes", 5, "defaults")
+
+    rules, aliases, weak_aliases = {}, {}, {}
+    for key, table in data.get("types", {}).items():
+        where = f"types.{key}"
+        if key != key.upper():
+            raise CatalogError(f"{where}: type keys must be upper case")
+        kind = table.get("kind")
+        if kind not in KINDS:
+            raise CatalogError(f"{where}: kind must be one of {', '.join(KINDS)}")
+        hours = table.get("hours")
+        if not isinstance(hours, (int, float)) or hours <= 0:
+            raise CatalogError(f"{where}: hours must be a positive number")
+        rules[key] = SpawnRule(
+            key, kind, str(table.get("name", key)), timedelta(hours=hours),
+            _minutes(table, "grace_minutes", grace.total_seconds() / 60, where),
+            _minutes(table, "warn_minutes", warn.total_seconds() / 60, where),
+            _minutes(table, "extend_minutes", None, where),
+        )
+        for word in _words(table, "aliases", where):
+            aliases[word] = key
+        for word in _words(table, "weak_aliases", where):
+            weak_aliases[word] = key
+    if not rules:
+        raise CatalogError("catalog defines no [types]")
+    default_card = defaults.get("card", next((k for k, r in rules.items() if r.kind == "card"), None))
+    if default_card not in rules or rules[default_card].kind != "card":
+        raise CatalogError("defaults: card must name a card type")
+
+    locations, location_aliases = {}, {}
+    for key, table in data.get("locations", {}).items():
+        where = f"locations.{key}"
+        name = str(table.get("name", key))
+        label = str(table.get("label", key.replace(" ", "")))
+        if not label.isalnum():
+            raise CatalogError(f"{where}: label must be letters and digits only")
+        locations[key] = (name, label)
+        for word in _words(table, "aliases", where) or [key]:
+            if len(word.split()) > 2:
+                raise CatalogError(f"{where}: aliases are one word or two")
+            location_aliases[" ".join(word.split())] = key
+
+    fallback = SpawnRule("UNKNOWN", "card", "Unknown", timedelta(hours=2), grace, warn, None)
+    return Catalog(rules, locations, aliases, weak_aliases, location_aliases, default_card, fallback, source)
+
+
+def load_catalog(path: str = CATALOG_PATH) -> Catalog:
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise CatalogError(f"{path}: {e}") from e
+    return compile_catalog(data, path)
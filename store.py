@@ -0,0 +1,244 @@
+import logging
+import queue
+import sqlite3
+import threading
+
+import events
+
+# ---------------- SCHEMA ----------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timers (
+    channel_id INTEGER NOT NULL,
+    spawn_key  TEXT    NOT NULL,
+    next_spawn REAL    NOT NULL,
+    origin     REAL,
+    warned     INTEGER NOT NULL DEFAULT 0,
+    extended   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (channel_id, spawn_key)
+);
+CREATE TABLE IF NOT EXISTS last_spawn (
+    channel_id INTEGER NOT NULL,
+    spawn_key  TEXT    NOT NULL,
+    origin     REAL    NOT NULL,
+    PRIMARY KEY (channel_id, spawn_key)
+);
+CREATE TABLE IF NOT EXISTS user_sent (
+    user_id    INTEGER NOT NULL,
+    spawn_key  TEXT    NOT NULL,
+    next_spawn REAL    NOT NULL,
+    PRIMARY KEY (user_id, spawn_key)
+);
+CREATE TABLE IF NOT EXISTS board_sections (
+    channel_id INTEGER NOT NULL,
+    section    TEXT    NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, section)
+);
+CREATE TABLE IF NOT EXISTS deletions (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    due        REAL    NOT NULL,
+    PRIMARY KEY (channel_id, message_id)
+);
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id   INTEGER
+);
+CREATE TABLE IF NOT EXISTS tz_overrides (
+    user_id INTEGER PRIMARY KEY,
+    zone    TEXT    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    id  INTEGER PRIMARY KEY CHECK (id = 0),
+    seq INTEGER NOT NULL            -- bumped by every committed write batch
+);
+INSERT OR IGNORE INTO meta VALUES (0, 0);
+"""
+
+_STOP = object()
+
+
+class TimerStore:
+    """SQLite (WAL) journal for timer state.
+
+    Reads go through their own connection, each load in one snapshot; they
+    happen at startup, or continuously on a standby mirroring the leader.
+    Every write is queued and applied by a single background thread in
+    batched transactions, so the event loop never waits on disk. With a
+    fence set, a batch only commits while fence(conn) holds inside the
+    transaction; other batches are dropped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fence = None           # callable(conn) -> bool, checked before each batch commits
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="timer-store", daemon=True)
+        self._writer.start()
+
+    # ---------------- READS ----------------
+    def load(self) -> dict:
+        cur = self._reader.cursor()
+        cur.execute("BEGIN")
+        try:
+            return self._load(cur)
+        finally:
+            cur.execute("COMMIT")
+
+    def _load(self, cur) -> dict:
+        return {
+            "seq": cur.execute("SELECT seq FROM meta").fetchone()[0],
+            "timers": cur.execute(
+                "SELECT channel_id, spawn_key, next_spawn, origin, warned, extended FROM timers"
+            ).fetchall(),
+            "last_spawn": cur.execute(
+                "SELECT channel_id, spawn_key, origin FROM last_spawn"
+            ).fetchall(),
+            "user_sent": cur.execute(
+                "SELECT user_id, spawn_key, next_spawn FROM user_sent"
+            ).fetchall(),
+            "boards": cur.execute("SELECT channel_id, section, message_id FROM board_sections").fetchall(),
+            "deletions": cur.execute("SELECT channel_id, message_id, due FROM deletions").fetchall(),
+            "tz_overrides": cur.execute("SELECT user_id, zone FROM tz_overrides").fetchall(),
+            "channels": cur.execute("SELECT channel_id, guild_id FROM channels").fetchall(),
+        }
+
+    def load_channels(self) -> list:
+        return self._reader.execute("SELECT channel_id, guild_id FROM channels").fetchall()
+
+    def sequence(self) -> int:
+        """Changes whenever a write batch commits, from any process."""
+        return self._reader.execute("SELECT seq FROM meta").fetchone()[0]
+
+    # ---------------- WRITES (non-blocking) ----------------
+    def put_timer(self, channel_id: int, spawn_key: str, next_spawn: float,
+                  origin: float | None, warned: bool, extended: bool):
+        self._queue.put((
+            "INSERT OR REPLACE INTO timers VALUES (?, ?, ?, ?, ?, ?)",
+            (channel_id, spawn_key, next_spawn, origin, int(warned), int(extended)),
+        ))
+
+    def delete_timer(self, channel_id: int, spawn_key: str):
+        self._queue.put((
+            "DELETE FROM timers WHERE channel_id = ? AND spawn_key = ?",
+            (channel_id, spawn_key),
+        ))
+
+    def put_last_spawn(self, channel_id: int, spawn_key: str, origin: float):
+        self._queue.put((
+            "INSERT OR REPLACE INTO last_spawn VALUES (?, ?, ?)",
+            (channel_id, spawn_key, origin),
+        ))
+
+    def delete_last_spawn(self, channel_id: int, spawn_key: str):
+        self._queue.put((
+            "DELETE FROM last_spawn WHERE channel_id = ? AND spawn_key = ?",
+            (channel_id, spawn_key),
+        ))
+
+    def put_user_sent(self, user_id: int, spawn_key: str, next_spawn: float):
+        self._queue.put((
+            "INSERT OR REPLACE INTO user_sent VALUES (?, ?, ?)",
+            (user_id, spawn_key, next_spawn),
+        ))
+
+    def put_board(self, channel_id: int, section: str, message_id: int):
+        self._queue.put((
+            "INSERT OR REPLACE INTO board_sections VALUES (?, ?, ?)",
+            (channel_id, section, message_id),
+        ))
+
+    def delete_board(self, channel_id: int, section: str | None = None):
+        """Forget one board section, or every section of the channel."""
+        if section is None:
+            self._queue.put(("DELETE FROM board_sections WHERE channel_id = ?", (channel_id,)))
+        else:
+            self._queue.put((
+                "DELETE FROM board_sections WHERE channel_id = ? AND section = ?",
+                (channel_id, section),
+            ))
+
+    def put_deletion(self, channel_id: int, message_id: int, due: float):
+        self._queue.put(("INSERT OR REPLACE INTO deletions VALUES (?, ?, ?)", (channel_id, message_id, due)))
+
+    def delete_deletions(self, channel_id: int, message_ids):
+        self._queue.put((
+            "DELETE FROM deletions WHERE channel_id = ? AND message_id IN (%s)" % ",".join("?" * len(message_ids)),
+            (channel_id, *message_ids),
+        ))
+
+    def put_channel(self, channel_id: int, guild_id: int | None):
+        self._queue.put(("INSERT OR REPLACE INTO channels VALUES (?, ?)", (channel_id, guild_id)))
+
+    def delete_channel(self, channel_id: int):
+        self._queue.put(("DELETE FROM channels WHERE channel_id = ?", (channel_id,)))
+
+    def put_tz_override(self, user_id: int, zone: str):
+        self._queue.put(("INSERT OR REPLACE INTO tz_overrides VALUES (?, ?)", (user_id, zone)))
+
+    def delete_tz_override(self, user_id: int):
+        self._queue.put(("DELETE FROM tz_overrides WHERE user_id = ?", (user_id,)))
+
+    def compact(self, cutoff: float, last_spawn_cutoff: float, deletion_cutoff: float):
+        """Drop dedup rows whose timers expired before cutoff, last spawns older
+        than last_spawn_cutoff, deletions due before deletion_cutoff, and fold
+        the WAL back into the main file."""
+        self._queue.put(("DELETE FROM user_sent WHERE next_spawn < ?", (cutoff,)))
+        self._queue.put(("DELETE FROM last_spawn WHERE origin < ?", (last_spawn_cutoff,)))
+        self._queue.put(("DELETE FROM deletions WHERE due < ?", (deletion_cutoff,)))
+        self._queue.put(("PRAGMA wal_checkpoint(TRUNCATE)", ()))
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._conn.close()
+        self._reader.close()
+
+    # ---------------- WRITER THREAD ----------------
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._apply(batch)
+            if stop:
+                return
+
+    def _apply(self, batch):
+        try:
+            # IMMEDIATE takes the write lock first, so the fence check and the
+            # writes see the same lease row
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self.fence is not None and not self.fence(self._conn):
+                self._conn.execute("ROLLBACK")
+                events.emit("store.fenced", logging.WARNING, statements=len(batch))
+                return
+            for sql, params in batch:
+                if sql.startswith("PRAGMA"):
+                    continue
+                self._conn.execute(sql, params)
+            self._conn.execute("UPDATE meta SET seq = seq + 1")
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            events.emit("store.write_failed", logging.WARNING, error=str(e), statements=len(batch))
+            return
+        for sql, params in batch:
+            if sql.startswith("PRAGMA"):
+                self._conn.execute(sql, params)
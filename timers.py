@@ -0,0 +1,127 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+
+
+class SpawnTimer:
+    """One tracked spawn in one channel."""
+
+    __slots__ = ("channel_id", "key", "next_spawn", "origin", "warned", "extended")
+
+    def __init__(self, channel_id: int, key: str, next_spawn: datetime,
+                 origin: datetime | None = None, warned: bool = False, extended: bool = False):
+        self.channel_id = channel_id
+        self.key = key
+        self.next_spawn = next_spawn        # datetime (PHT) of the NEXT spawn
+        self.origin = origin                # original taken time (PHT)
+        self.warned = warned                # 5-minute warning already sent
+        self.extended = extended            # BCARD auto-extend already applied
+
+    @property
+    def channel_key(self) -> tuple:
+        return (self.channel_id, self.key)
+
+    def _order(self) -> tuple:
+        return (self.next_spawn.timestamp(), self.key)
+
+
+class ChannelTimers:
+    """Timers of one channel, indexed by key and kept sorted by next spawn."""
+
+    __slots__ = ("by_key", "order", "boards")
+
+    def __init__(self):
+        self.by_key = {}            # spawn_key -> SpawnTimer
+        self.order = []             # sorted (next_spawn_ts, spawn_key)
+        self.boards = {}            # board section -> message id of the "Upcoming Spawns" message
+
+
+class TimerIndex:
+    """Single owner of all timer state; every handler reads and writes through it."""
+
+    def __init__(self):
+        self._channels = {}
+
+    def __len__(self):
+        return sum(len(c.by_key) for c in self._channels.values())
+
+    def __iter__(self):
+        for c in list(self._channels.values()):
+            yield from list(c.by_key.values())
+
+    def _channel(self, channel_id: int) -> ChannelTimers:
+        c = self._channels.get(channel_id)
+        if c is None:
+            c = self._channels[channel_id] = ChannelTimers()
+        return c
+
+    def channel_ids(self):
+        return list(self._channels)
+
+    def clear(self):
+        self._channels.clear()
+
+    def drop_channel(self, channel_id: int) -> list:
+        """Forget a channel entirely; returns the timers it still held."""
+        c = self._channels.pop(channel_id, None)
+        return list(c.by_key.values()) if c else []
+
+    def counts(self) -> dict:
+        """Live timers per channel."""
+        return {cid: len(c.by_key) for cid, c in self._channels.items()}
+
+    # ---------------- TIMERS ----------------
+    def get(self, channel_id: int, key: str) -> SpawnTimer | None:
+        c = self._channels.get(channel_id)
+        return c.by_key.get(key) if c else None
+
+    def channel(self, channel_id: int) -> list:
+        """Timers of one channel in next-spawn order, O(k)."""
+        c = self._channels.get(channel_id)
+        if not c:
+            return []
+        return [c.by_key[key] for _, key in c.order]
+
+    def set(self, channel_id: int, key: str, next_spawn: datetime, origin: datetime | None = None,
+            warned: bool = False, extended: bool = False) -> SpawnTimer:
+        """Create or overwrite a timer; an overwrite resets warn/extend flags unless given."""
+        c = self._channel(channel_id)
+        old = c.by_key.get(key)
+        if old is not None:
+            self._unlink(c, old)
+        timer = SpawnTimer(channel_id, key, next_spawn, origin, warned, extended)
+        c.by_key[key] = timer
+        insort(c.order, timer._order())
+        return timer
+
+    def move(self, timer: SpawnTimer, next_spawn: datetime):
+        """Shift an existing timer's next spawn, keeping the channel order."""
+        c = self._channel(timer.channel_id)
+        self._unlink(c, timer)
+        timer.next_spawn = next_spawn
+        insort(c.order, timer._order())
+
+    def remove(self, channel_id: int, key: str) -> SpawnTimer | None:
+        c = self._channels.get(channel_id)
+        timer = c.by_key.pop(key, None) if c else None
+        if timer is not None:
+            self._unlink(c, timer)
+        return timer
+
+    @staticmethod
+    def _unlink(c: ChannelTimers, timer: SpawnTimer):
+        i = bisect_left(c.order, timer._order())
+        if i < len(c.order) and c.order[i][1] == timer.key:
+            del c.order[i]
+
+    # ---------------- PER-CHANNEL METADATA ----------------
+    def board_ids(self, channel_id: int) -> dict:
+        """Board section -> message id for one channel."""
+        c = self._channels.get(channel_id)
+        return dict(c.boards) if c else {}
+
+    def set_board_id(self, channel_id: int, section: str, message_id: int | None):
+        boards = self._channel(channel_id).boards
+        if message_id is None:
+            boards.pop(section, None)
+        else:
+            boards[section] = message_id
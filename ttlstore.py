@@ -0,0 +1,92 @@
+import sys
+from collections import OrderedDict
+
+import clock
+
+_MISSING = object()
+
+
+class TTLStore:
+    """Mapping whose entries expire at their own deadline, capped at maxsize.
+
+    Expiry uses a timing wheel of `granularity`-second slots: each set files
+    the key under its deadline's slot, and every write sweeps the slots that
+    have passed since the last sweep. Each filed key is looked at once, so
+    eviction is amortized O(1). Keys re-set with a later deadline are left in
+    their old slot and skipped when it is swept. Past maxsize the oldest
+    write is dropped first.
+    """
+
+    def __init__(self, name: str, maxsize: int, granularity: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.granularity = granularity
+        self._data = OrderedDict()      # key -> (value, expires_at), oldest write first
+        self._wheel = {}                # slot -> [keys]
+        self._cursor = None             # first slot not yet swept
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key, default=None):
+        hit = self._data.get(key)
+        if hit is None or hit[1] <= clock.time():
+            return default
+        return hit[0]
+
+    def set(self, key, value, expires_at: float):
+        now = clock.time()
+        self._sweep(now)
+        if expires_at <= now:
+            self.pop(key)
+            return
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        self._wheel.setdefault(int(expires_at // self.granularity), []).append(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evicted += 1
+
+    def pop(self, key, default=None):
+        hit = self._data.pop(key, None)
+        return default if hit is None else hit[0]
+
+    def items(self):
+        now = clock.time()
+        return [(k, v) for k, (v, exp) in self._data.items() if exp > now]
+
+    def clear(self):
+        self._data.clear()
+        self._wheel.clear()
+        self._cursor = None
+
+    def _sweep(self, now: float):
+        current = int(now // self.granularity)
+        if self._cursor is None or not self._wheel:
+            self._cursor = current
+            return
+        while self._cursor < current:
+            for key in self._wheel.pop(self._cursor, ()):
+                hit = self._data.get(key)
+                if hit is not None and hit[1] <= now:
+                    del self._data[key]
+                    self.expired += 1
+            self._cursor += 1
+
+    def stats(self) -> dict:
+        size = sys.getsizeof(self._data) + sys.getsizeof(self._wheel)
+        size += sum(sys.getsizeof(keys) for keys in self._wheel.values())
+        size += sum(sys.getsizeof(entry) for entry in self._data.values())
+        return {
+            "entries": len(self._data),
+            "slots": len(self._wheel),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "bytes": size,
+        }
+